@@ -0,0 +1,214 @@
+"""
+Point d'entrée de production : `python -m app serve --workers N`, et gestion des comptes
+(`python -m app create-user NOM --role admin`, `python -m app revoke-user NOM`).
+
+Lance N processus workers (gunicorn avec des workers uvicorn si gunicorn est installé,
+sinon le mode multi-processus d'uvicorn) pour utiliser tous les cœurs de la machine.
+Le budget de connexions DB_CONNECTION_BUDGET est réparti entre les workers (voir
+app.database.worker_pool_limits).
+
+Signaux (gunicorn) :
+    SIGTERM  arrêt gracieux : plus de nouvelles connexions, les requêtes en cours disposent
+             de GRACEFUL_TIMEOUT secondes, puis les pools sont fermés (lifespan)
+    SIGHUP   rechargement gracieux : nouveaux workers avec le code et la configuration à jour,
+             les anciens terminent leurs requêtes avant de s'arrêter
+"""
+import argparse
+import logging
+import os
+import sys
+from typing import Any, Dict
+
+APP = "app.main:app"
+
+
+def _uvicorn_worker_class() -> str:
+    """Classe de worker uvicorn pour gunicorn (paquet uvicorn-worker si installé)."""
+    try:
+        import uvicorn_worker  # noqa: F401
+    except ImportError:
+        return "uvicorn.workers.UvicornWorker"
+    return "uvicorn_worker.UvicornWorker"
+
+
+def serve_gunicorn(args: argparse.Namespace) -> None:
+    """
+    Démarre gunicorn (processus maître + workers uvicorn).
+
+    Args:
+        args (argparse.Namespace): Options de la commande `serve`.
+    """
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def __init__(self, options: Dict[str, Any]):
+            self.options = options
+            super().__init__()
+
+        def load_config(self) -> None:
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+
+            return app
+
+    Server({
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "worker_class": _uvicorn_worker_class(),
+        "graceful_timeout": args.graceful_timeout,
+        # Un worker bloqué plus longtemps que ce délai est redémarré par le maître
+        "timeout": max(args.graceful_timeout * 2, 60),
+        "keepalive": 5,
+        # Redémarre périodiquement les workers pour borner une éventuelle fuite mémoire
+        "max_requests": args.max_requests,
+        "max_requests_jitter": args.max_requests // 10 if args.max_requests else 0,
+        # Pas de préchargement : SIGHUP recharge le code, et chaque worker crée ses propres
+        # engines au démarrage (lifespan)
+        "preload_app": False,
+        "accesslog": "-" if args.access_log else None,
+    }).run()
+
+
+def serve_uvicorn(args: argparse.Namespace) -> None:
+    """
+    Démarre uvicorn, en mode multi-processus si plusieurs workers sont demandés.
+
+    Args:
+        args (argparse.Namespace): Options de la commande `serve`.
+    """
+    import uvicorn
+
+    uvicorn.run(
+        APP,
+        host=args.host,
+        port=args.port,
+        workers=None if args.reload else args.workers,
+        reload=args.reload,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        access_log=args.access_log,
+    )
+
+
+def serve(args: argparse.Namespace) -> None:
+    """
+    Prépare l'environnement partagé par les workers puis démarre le serveur.
+
+    Args:
+        args (argparse.Namespace): Options de la commande `serve`.
+    """
+    if args.reload:
+        # Le rechargement automatique (développement) ne fonctionne qu'avec un seul processus
+        args.workers = 1
+    # Les workers héritent de l'environnement : chacun calcule sa part du budget de connexions
+    os.environ["WEB_WORKERS"] = str(args.workers)
+
+    from app.config import settings
+    from app.database import worker_connections
+
+    if settings.db_connection_budget > 0:
+        # Refus avant le démarrage : chaque worker échouerait à la création de ses engines
+        try:
+            worker_connections(args.workers)
+        except ValueError as e:
+            sys.exit(f"{e} Augmentez DB_CONNECTION_BUDGET ou réduisez --workers.")
+
+    use_gunicorn = args.server == "gunicorn" or (args.server == "auto" and args.workers > 1 and not args.reload)
+    if use_gunicorn:
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            if args.server == "gunicorn":
+                sys.exit("gunicorn n'est pas installé (pip install gunicorn), ou utilisez --server uvicorn.")
+            use_gunicorn = False
+    if use_gunicorn:
+        serve_gunicorn(args)
+    else:
+        serve_uvicorn(args)
+
+
+def create_user(args: argparse.Namespace) -> None:
+    """
+    Crée un compte dans la table ApiUser (créée si elle n'existe pas).
+
+    Args:
+        args (argparse.Namespace): Options de la commande `create-user`.
+    """
+    import getpass
+
+    from sqlmodel import Session
+
+    from app import crud
+    from app.auth.auth import ROLE_SCOPES
+    from app.auth.crypto import hash_password
+    from app.database import get_engine
+    from app.models import User
+
+    if args.role not in ROLE_SCOPES:
+        sys.exit(f"Rôle inconnu : {args.role} (rôles : {', '.join(ROLE_SCOPES)})")
+    password = os.environ.get("NEW_USER_PASSWORD") or getpass.getpass("Mot de passe : ")
+    engine = get_engine()
+    User.__table__.create(engine, checkfirst=True)
+    with Session(engine) as session:
+        user = crud.create_user(session, args.username, hash_password(password), args.role, " ".join(args.scope))
+    print(f"Utilisateur {user.Username} créé (rôle {user.Role}).")
+
+
+def revoke_user(args: argparse.Namespace) -> None:
+    """
+    Révoque les tokens déjà émis pour un compte (effectif avec TOKEN_REVOCATION_CHECK).
+
+    Args:
+        args (argparse.Namespace): Options de la commande `revoke-user`.
+    """
+    from sqlmodel import Session
+
+    from app import crud
+    from app.database import get_engine
+
+    with Session(get_engine()) as session:
+        if not crud.revoke_user_tokens(session, args.username):
+            sys.exit(f"Utilisateur inconnu : {args.username}")
+    print(f"Tokens de {args.username} révoqués.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app", description="API CRUD des produits.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Démarre le serveur HTTP")
+    serve_parser.add_argument("--host", default="0.0.0.0", help="Adresse d'écoute")
+    serve_parser.add_argument("--port", type=int, default=8000, help="Port d'écoute")
+    serve_parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_WORKERS", os.cpu_count() or 1)),
+                              help="Nombre de processus workers (par défaut : nombre de cœurs)")
+    serve_parser.add_argument("--server", choices=["auto", "gunicorn", "uvicorn"], default="auto",
+                              help="Gestionnaire de processus (auto : gunicorn s'il est installé)")
+    serve_parser.add_argument("--graceful-timeout", type=int, default=int(os.environ.get("GRACEFUL_TIMEOUT", 30)),
+                              help="Délai laissé aux requêtes en cours à l'arrêt (secondes)")
+    serve_parser.add_argument("--max-requests", type=int, default=0,
+                              help="Redémarre un worker après ce nombre de requêtes (0 = jamais, gunicorn)")
+    serve_parser.add_argument("--reload", action="store_true", help="Rechargement automatique (développement)")
+    serve_parser.add_argument("--access-log", action="store_true", help="Journalise chaque requête")
+
+    user_parser = commands.add_parser("create-user", help="Crée un compte (mot de passe demandé ou NEW_USER_PASSWORD)")
+    user_parser.add_argument("username", help="Nom d'utilisateur")
+    user_parser.add_argument("--role", default="reader", help="Rôle : admin ou reader")
+    user_parser.add_argument("--scope", action="append", default=[], help="Scope supplémentaire (répétable)")
+
+    revoke_parser = commands.add_parser("revoke-user", help="Révoque les tokens déjà émis pour un compte")
+    revoke_parser.add_argument("username", help="Nom d'utilisateur")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "serve":
+        serve(args)
+    elif args.command == "create-user":
+        create_user(args)
+    elif args.command == "revoke-user":
+        revoke_user(args)
+
+
+if __name__ == "__main__":
+    main()
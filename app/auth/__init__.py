@@ -1,3 +1,11 @@
-from .auth import create_access_token, authenticate_user, get_current_user
-
+# Import différé : `app.auth.crypto` (et les scripts temp.py / verif_password.py) reste
+# utilisable sans charger FastAPI ni la configuration
 __all__ = ["create_access_token", "authenticate_user", "get_current_user"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        from app.auth import auth
+
+        return getattr(auth, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
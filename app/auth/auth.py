@@ -1,73 +1,110 @@
-import os
-from dotenv import load_dotenv
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, List, Optional
+from app import crud
+from app.auth.hashing import login_cache, password_verifier
+from app.auth.tokens import TokenError, token_cache, token_codec
+from app.cache import InMemoryCache
+from app.config import settings
+from app.database import session_scope
+from app.metrics import timed
+
+# La clé secrète, l'algorithme et le mot de passe haché proviennent uniquement de
+# app.config.settings (validés au démarrage) pour éviter deux sources divergentes.
 
-# Charge les variables d'environnement
-load_dotenv()
+# Dépendance OAuth2
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-# Récupére des variables depuis le fichier .env 
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
-HASHED_PASSWORD = os.getenv("HASHED_PASSWORD")
+# Scopes accordés par rôle ; les scopes propres à un compte (colonne Scopes) s'y ajoutent
+ROLE_SCOPES = {
+    "admin": ("products:read", "products:write"),
+    "reader": ("products:read",),
+}
+WRITE_SCOPE = "products:write"
 
-# Vérifie la présence des variables d'environnement critiques
-if not SECRET_KEY:
-    raise ValueError("La variable SECRET_KEY n'est pas définie dans le fichier .env.")
-if not HASHED_PASSWORD:
-    raise ValueError("La variable HASHED_PASSWORD n'est pas définie dans le fichier .env.")
+# État des comptes (actif, version des tokens) pour la vérification de révocation
+user_cache = InMemoryCache(max_size=settings.user_cache_size, ttl=settings.user_cache_ttl)
 
-# Gestion des mots de passe
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-# Dépendance OAuth2
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+def user_scopes(role: str, extra_scopes: str = "") -> List[str]:
+    """
+    Calcule les scopes d'un compte à partir de son rôle et de ses scopes supplémentaires.
+
+    Args:
+        role (str): Rôle du compte.
+        extra_scopes (str): Scopes supplémentaires, séparés par des espaces.
 
-# Vérifie si le mot de passe est correct
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+    Returns:
+        List[str]: Scopes triés, sans doublon.
     """
-    Vérifie si le mot de passe en texte clair correspond au mot de passe haché.
+    return sorted(set(ROLE_SCOPES.get(role, ())) | set(extra_scopes.split()))
+
+
+async def load_user(username: str) -> Optional[Dict[str, Any]]:
+    """
+    Lit un compte dans la table ApiUser (recherche par l'index unique sur Username).
 
     Args:
-        plain_password (str): Mot de passe en texte clair.
-        hashed_password (str): Mot de passe haché.
+        username (str): Nom d'utilisateur.
 
     Returns:
-        bool: True si le mot de passe est valide, sinon False.
+        Optional[Dict[str, Any]]: Colonnes du compte, ou None s'il n'existe pas.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    async with session_scope() as session:
+        return await session.run_sync(crud.get_user_by_username, username)
+
 
 # Authentifie un utilisateur
-def authenticate_user(username: str, password: str) -> bool:
+async def authenticate_user(username: str, password: str) -> Dict[str, Any]:
     """
     Authentifie l'utilisateur en vérifiant le nom d'utilisateur et le mot de passe.
 
+    Le compte BOOTSTRAP_USERNAME est vérifié avec HASHED_PASSWORD sans accès à la base ;
+    les autres comptes sont lus dans la table ApiUser. La vérification bcrypt s'exécute
+    dans un pool de threads dédié, et les connexions réussies peuvent être mémorisées
+    brièvement (LOGIN_CACHE_TTL).
+
     Args:
         username (str): Nom d'utilisateur.
         password (str): Mot de passe.
 
     Returns:
-        bool: True si l'utilisateur est authentifié avec succès.
+        Dict[str, Any]: Nom, rôle, scopes et version des tokens du compte, à copier dans le token.
 
     Raises:
-        HTTPException: Si le nom d'utilisateur ou le mot de passe est incorrect.
+        HTTPException: Si le nom d'utilisateur ou le mot de passe est incorrect,
+            ou 429 si trop de vérifications sont déjà en cours.
     """
-    if username != "testuser":
+    if username == settings.bootstrap_username:
+        user = {
+            "HashedPassword": settings.hashed_password, "Role": settings.bootstrap_role,
+            "Scopes": "", "IsActive": True, "TokenVersion": 0,
+        }
+    else:
+        user = await load_user(username)
+    if user is None or not user["IsActive"]:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Nom d'utilisateur incorrect",
         )
-    if not verify_password(password, HASHED_PASSWORD):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Mot de passe incorrect",
-        )
-    return True
+
+    hashed_password = user["HashedPassword"]
+    if not login_cache.contains(username, password, hashed_password):
+        with timed("auth"):
+            verified = await password_verifier.verify(password, hashed_password)
+        if not verified:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Mot de passe incorrect",
+            )
+        login_cache.add(username, password, hashed_password)
+    return {
+        "username": username,
+        "role": user["Role"],
+        "scopes": user_scopes(user["Role"], user["Scopes"]),
+        "ver": user["TokenVersion"],
+    }
 
 # Crée un token d'accès
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -75,48 +112,87 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     Génère un token JWT pour l'utilisateur.
 
     Args:
-        data (dict): Données à encoder dans le token.
+        data (dict): Données à encoder dans le token (`sub`, `role`, `scope`, `ver`).
         expires_delta (Optional[timedelta]): Durée de validité du token.
 
     Returns:
         str: Token JWT encodé.
     """
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.access_token_expire_minutes))
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = token_codec.encode(to_encode)
     return encoded_jwt
 
+async def check_not_revoked(username: str, token_version: int) -> bool:
+    """
+    Vérifie que le compte est toujours actif et que la version du token est la version courante.
+
+    L'état des comptes est mémorisé USER_CACHE_TTL secondes : une révocation prend effet
+    au plus tard après ce délai, sans lecture de la table à chaque requête.
+
+    Args:
+        username (str): Nom d'utilisateur (claim `sub`).
+        token_version (int): Version des tokens au moment de l'émission (claim `ver`).
+
+    Returns:
+        bool: True si le token est toujours valable.
+    """
+    state = user_cache.get(username)
+    if state is None:
+        user = await load_user(username)
+        state = (user["IsActive"], user["TokenVersion"]) if user else (False, None)
+        user_cache.set(username, state)
+    is_active, current_version = state
+    return is_active and current_version == token_version
+
 # Dépendance pour obtenir l'utilisateur actuel
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     """
     Vérifie le token JWT et retourne les détails de l'utilisateur actuel.
 
+    Le rôle et les scopes proviennent du token : aucune lecture de la base n'est nécessaire,
+    sauf si TOKEN_REVOCATION_CHECK est actif (lecture mémorisée, voir `check_not_revoked`).
+    Les tokens déjà validés sont mémorisés jusqu'à leur expiration : une requête
+    répétée avec le même token évite le décodage et la vérification de signature.
+
     Args:
         token (str): Token JWT.
 
     Returns:
-        dict: Détails de l'utilisateur connecté.
+        dict: Nom, rôle, scopes et indicateur `is_admin` de l'utilisateur connecté.
 
     Raises:
-        HTTPException: Si le token est invalide ou expiré.
+        HTTPException: Si le token est invalide, expiré ou révoqué.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Impossible de valider les informations d'identification",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        # Décodage du token
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    with timed("auth"):
+        payload = token_cache.get(token)
+        if payload is None:
+            try:
+                # Décodage du token
+                payload = token_codec.decode(token)
+            except TokenError:
+                raise credentials_exception
+            token_cache.add(token, payload)
+
         username: str = payload.get("sub")
-        if username is None:
+        role: str = payload.get("role")
+        # Les tokens émis avant l'introduction des rôles doivent être renouvelés
+        if username is None or role is None:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-
-    # Vérifie que l'utilisateur est valide
-    if username != "testuser":
-        raise credentials_exception
-    
-    return {"username": username}
+
+        if settings.token_revocation_check and username != settings.bootstrap_username:
+            if not await check_not_revoked(username, payload.get("ver", 0)):
+                raise credentials_exception
+
+    return {
+        "username": username,
+        "role": role,
+        "scopes": payload.get("scope", "").split(),
+        "is_admin": role == "admin",
+    }
@@ -0,0 +1,48 @@
+"""
+Contexte de hachage bcrypt partagé par l'API et les scripts (temp.py, verif_password.py).
+
+Le contexte passlib n'est construit qu'au premier hachage ou à la première vérification,
+pour ne pas ralentir le démarrage des workers. Ce module ne dépend pas de app.config :
+il peut servir à générer HASHED_PASSWORD avant que le fichier .env ne soit complet.
+"""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    """
+    Renvoie le contexte de hachage des mots de passe, créé au premier appel.
+
+    Returns:
+        CryptContext: Contexte passlib configuré pour bcrypt.
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password(plain_password: str) -> str:
+    """
+    Hache un mot de passe avec bcrypt.
+
+    Args:
+        plain_password (str): Mot de passe en texte clair.
+
+    Returns:
+        str: Mot de passe haché.
+    """
+    return get_pwd_context().hash(plain_password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Vérifie si le mot de passe en texte clair correspond au mot de passe haché.
+
+    Args:
+        plain_password (str): Mot de passe en texte clair.
+        hashed_password (str): Mot de passe haché.
+
+    Returns:
+        bool: True si le mot de passe est valide, sinon False.
+    """
+    return get_pwd_context().verify(plain_password, hashed_password)
@@ -0,0 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import asyncio
+import hashlib
+import hmac
+import secrets
+from fastapi import HTTPException, status
+from app.auth.crypto import verify_password
+from app.cache import InMemoryCache
+from app.config import settings
+
+
+class PasswordVerifier:
+    """
+    Vérifie les mots de passe bcrypt dans un pool de threads borné.
+
+    bcrypt consomme 100 à 300 ms de CPU par vérification : exécutée dans une route
+    `async def`, elle bloque tout le worker. Au-delà de `max_pending` vérifications
+    en cours ou en attente, les nouvelles demandes sont refusées (429).
+
+    Args:
+        workers (int): Nombre de threads dédiés à bcrypt.
+        max_pending (int): Nombre maximal de vérifications en cours ou en attente.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Vérifie le mot de passe sans bloquer la boucle d'événements.
+
+        Raises:
+            HTTPException: 429 si le pool de vérification est saturé.
+        """
+        if self.pending >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Trop de tentatives de connexion simultanées, réessayez plus tard",
+                headers={"Retry-After": "1"},
+            )
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, verify_password, plain_password, hashed_password)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        """Arrête les threads bcrypt (arrêt du worker) ; ils seront recréés au besoin."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class LoginCache:
+    """
+    Mémorise brièvement les connexions réussies pour éviter de refaire le calcul bcrypt.
+
+    Les entrées sont indexées par un HMAC de (nom d'utilisateur, mot de passe, hachage stocké)
+    avec une clé aléatoire propre au processus : aucun mot de passe n'est conservé en clair,
+    et un changement de mot de passe invalide les entrées existantes.
+
+    Args:
+        ttl (float): Durée de validité d'une entrée en secondes (0 désactive le cache).
+        max_size (int): Nombre maximal d'entrées.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.enabled = ttl > 0
+        self._entries = InMemoryCache(max_size=max_size, ttl=ttl)
+        self._key = secrets.token_bytes(32)
+
+    def _digest(self, username: str, password: str, hashed_password: str) -> bytes:
+        message = "\0".join((username, password, hashed_password)).encode("utf-8")
+        return hmac.new(self._key, message, hashlib.sha256).digest()
+
+    def contains(self, username: str, password: str, hashed_password: str) -> bool:
+        """Indique si cette connexion a déjà été validée récemment."""
+        return self.enabled and self._entries.get(self._digest(username, password, hashed_password)) is not None
+
+    def add(self, username: str, password: str, hashed_password: str) -> None:
+        """Enregistre une connexion réussie."""
+        if self.enabled:
+            self._entries.set(self._digest(username, password, hashed_password), True)
+
+
+password_verifier = PasswordVerifier(settings.password_workers, settings.password_max_pending)
+login_cache = LoginCache(settings.login_cache_ttl, settings.login_cache_size)
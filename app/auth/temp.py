@@ -1,8 +1,7 @@
 import os
-from passlib.context import CryptContext
+from app.auth import crypto
 
-# Initialisation du contexte de hachage avec bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Usage : python -m app.auth.temp (le mot de passe est lu dans PLAIN_PASSWORD)
 
 def hash_password(plain_password: str) -> str:
     """
@@ -15,7 +14,7 @@ def hash_password(plain_password: str) -> str:
         str: Le mot de passe haché.
     """
     try:
-        hashed_password = pwd_context.hash(plain_password)
+        hashed_password = crypto.hash_password(plain_password)
         return hashed_password
     except Exception as e:
         # Gestion des erreurs pendant le hachage du mot de passe
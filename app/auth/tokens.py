@@ -0,0 +1,163 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Optional
+import base64
+import calendar
+import hashlib
+import hmac
+import json
+import time
+from app.cache import InMemoryCache
+from app.config import settings
+
+
+class TokenError(Exception):
+    """Token JWT invalide, mal formé ou expiré."""
+
+
+class TokenCodec(ABC):
+    """
+    Interface d'encodage et de décodage des tokens JWT.
+
+    Args:
+        secret_key (str): Clé secrète de signature.
+        algorithm (str): Algorithme de signature.
+    """
+
+    def __init__(self, secret_key: str, algorithm: str):
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+
+    @abstractmethod
+    def encode(self, claims: Dict[str, Any]) -> str:
+        """Signe les données et renvoie le token encodé."""
+
+    @abstractmethod
+    def decode(self, token: str) -> Dict[str, Any]:
+        """
+        Vérifie la signature et l'expiration du token et renvoie ses données.
+
+        Raises:
+            TokenError: Si le token est invalide ou expiré.
+        """
+
+
+class JoseCodec(TokenCodec):
+    """Encodage des tokens avec python-jose (tous les algorithmes supportés par jose)."""
+
+    def encode(self, claims: Dict[str, Any]) -> str:
+        from jose import jwt
+
+        return jwt.encode(claims, self.secret_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        from jose import jwt, JWTError
+
+        try:
+            return jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        except JWTError as e:
+            raise TokenError(str(e)) from e
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class HS256Codec(TokenCodec):
+    """
+    Implémentation minimale de HS256 avec la bibliothèque standard (hmac, json, base64).
+
+    Produit et accepte les mêmes tokens que JoseCodec pour HS256, sans le coût des
+    validations génériques de jose.
+    """
+
+    _header = _b64encode(json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode())
+
+    def __init__(self, secret_key: str, algorithm: str = "HS256"):
+        if algorithm != "HS256":
+            raise ValueError(f"HS256Codec ne supporte pas l'algorithme {algorithm}.")
+        super().__init__(secret_key, algorithm)
+        self._key = secret_key.encode("utf-8")
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        return hmac.new(self._key, signing_input, hashlib.sha256).digest()
+
+    def encode(self, claims: Dict[str, Any]) -> str:
+        payload = {
+            key: calendar.timegm(value.utctimetuple()) if isinstance(value, datetime) else value
+            for key, value in claims.items()
+        }
+        signing_input = f"{self._header}.{_b64encode(json.dumps(payload, separators=(',', ':')).encode())}"
+        return f"{signing_input}.{_b64encode(self._sign(signing_input.encode('ascii')))}"
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        try:
+            header_segment, payload_segment, signature_segment = token.split(".")
+            header = json.loads(_b64decode(header_segment))
+            signature = _b64decode(signature_segment)
+            payload = json.loads(_b64decode(payload_segment))
+        except ValueError as e:
+            raise TokenError("Token mal formé") from e
+
+        if not isinstance(header, dict) or header.get("alg") != "HS256":
+            raise TokenError("Algorithme non autorisé")
+        expected = self._sign(f"{header_segment}.{payload_segment}".encode("ascii"))
+        if not hmac.compare_digest(signature, expected):
+            raise TokenError("Signature invalide")
+        if not isinstance(payload, dict):
+            raise TokenError("Données du token invalides")
+        exp = payload.get("exp")
+        if exp is not None and (not isinstance(exp, (int, float)) or exp <= time.time()):
+            raise TokenError("Token expiré")
+        return payload
+
+
+# Implémentations disponibles, choisies par JWT_BACKEND
+TOKEN_CODECS = {"jose": JoseCodec, "hs256": HS256Codec}
+
+
+class TokenCache:
+    """
+    Cache borné des tokens déjà validés.
+
+    Indexé par l'empreinte SHA-256 du token, chaque entrée expire à la date `exp` du token :
+    une requête répétée avec le même token ne coûte qu'une recherche dans un dictionnaire.
+
+    Args:
+        max_size (int): Nombre maximal de tokens mémorisés (0 désactive le cache).
+    """
+
+    def __init__(self, max_size: int):
+        self.enabled = max_size > 0
+        self._entries = InMemoryCache(max_size=max(max_size, 1))
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Renvoie les données d'un token déjà validé et non expiré, sinon None."""
+        if not self.enabled:
+            return None
+        return self._entries.get(self._digest(token))
+
+    def add(self, token: str, claims: Dict[str, Any]) -> None:
+        """Mémorise un token validé jusqu'à son expiration."""
+        exp = claims.get("exp")
+        # Un token sans date d'expiration n'est jamais mis en cache
+        if not self.enabled or not isinstance(exp, (int, float)):
+            return
+        ttl = exp - time.time()
+        if ttl > 0:
+            self._entries.set(self._digest(token), claims, ttl=ttl)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+token_codec: TokenCodec = TOKEN_CODECS[settings.jwt_backend](settings.secret_key, settings.algorithm)
+token_cache = TokenCache(settings.token_cache_size)
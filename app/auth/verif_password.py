@@ -1,12 +1,6 @@
-import os
-from passlib.context import CryptContext
-from dotenv import load_dotenv
+from app.auth import crypto
 
-# Charge explicitement les variables d'environnement
-load_dotenv()
-
-# Crée un contexte pour bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Usage : python -m app.auth.verif_password (HASHED_PASSWORD est lu par app.config, .env compris)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -20,15 +14,15 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         bool: True si les mots de passe correspondent, sinon False.
     """
     try:
-        return pwd_context.verify(plain_password, hashed_password)
+        return crypto.verify_password(plain_password, hashed_password)
     except Exception as e:
         raise ValueError(f"Erreur lors de la vérification du mot de passe : {str(e)}")
 
 if __name__ == "__main__":
-    # Charge le mot de passe haché depuis les variables d'environnement
-    hashed_password = os.getenv("HASHED_PASSWORD")
-    if not hashed_password:
-        raise ValueError("La variable d'environnement HASHED_PASSWORD est manquante.")
+    # Charge le mot de passe haché depuis la configuration (variables d'environnement et .env)
+    from app.config import settings
+
+    hashed_password = settings.hashed_password
 
     # Mot de passe en clair pour la vérification
     plain_password = "password"  
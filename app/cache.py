@@ -0,0 +1,146 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Optional, Tuple
+import time
+from app.config import settings
+
+
+class CacheBackend(ABC):
+    """
+    Interface des backends de cache.
+
+    Permet de remplacer le cache en mémoire par un cache partagé entre les workers
+    (Redis, memcached...) sans modifier les routes.
+    """
+
+    @abstractmethod
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Renvoie la valeur associée à la clé, ou None si elle est absente ou expirée."""
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Enregistre une valeur, avec une durée de vie en secondes (ttl) optionnelle."""
+
+    @abstractmethod
+    def delete(self, key: Hashable) -> None:
+        """Supprime la clé si elle existe."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Vide le cache."""
+
+
+class InMemoryCache(CacheBackend):
+    """
+    Cache LRU borné en mémoire, avec expiration des entrées (TTL).
+
+    Propre à chaque processus : une modification faite par un autre worker n'est visible
+    qu'à l'expiration de l'entrée.
+
+    Args:
+        max_size (int): Nombre maximal d'entrées conservées.
+        ttl (Optional[float]): Durée de vie par défaut des entrées, en secondes.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            # Évince les entrées les moins récemment utilisées
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class MonitoredCache:
+    """
+    Enveloppe un backend de cache et compte les succès (hits) et échecs (misses) de lecture.
+
+    Args:
+        backend (CacheBackend): Backend de stockage des entrées.
+        enabled (bool): Si False, le cache ne conserve rien et chaque lecture est un échec.
+    """
+
+    def __init__(self, backend: CacheBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value = self.backend.get(key) if self.enabled else None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if self.enabled:
+            self.backend.set(key, value, ttl)
+
+    def delete(self, key: Hashable) -> None:
+        self.backend.delete(key)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Renvoie les compteurs du cache, utiles pour le dimensionner.
+
+        Returns:
+            Dict[str, Any]: Succès, échecs, taux de succès et nombre d'entrées si connu.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self.backend) if hasattr(self.backend, "__len__") else None,
+        }
+
+
+# Cache des produits sérialisés, indexé par ProductID
+product_cache = MonitoredCache(
+    InMemoryCache(max_size=settings.product_cache_size, ttl=settings.product_cache_ttl),
+    enabled=settings.product_cache_enabled,
+)
+
+# Statistiques du catalogue (GET /products/stats), indexées par (génération des écritures, regroupement)
+stats_cache = MonitoredCache(
+    InMemoryCache(max_size=16, ttl=settings.stats_cache_ttl),
+    enabled=settings.stats_cache_enabled,
+)
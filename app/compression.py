@@ -0,0 +1,264 @@
+"""
+Compression des réponses négociée avec l'en-tête Accept-Encoding : zstd et brotli s'ils sont
+installés (paquets `zstandard` et `brotli`, optionnels), gzip sinon.
+
+Les réponses complètes plus petites que COMPRESSION_MINIMUM_SIZE sont envoyées telles quelles.
+Les réponses en flux (NDJSON) sont compressées paquet par paquet et chaque paquet est vidé
+immédiatement : le client reçoit les lignes au fil de l'eau, sans mise en mémoire du corps.
+"""
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+import zlib
+
+from app.config import settings
+
+# Types de contenu compressés (les images et archives le sont déjà)
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+class Compressor(ABC):
+    """
+    Interface des compresseurs incrémentaux.
+    """
+
+    @abstractmethod
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        """Compresse un paquet ; si `flush` est vrai, renvoie tout ce qui peut déjà être envoyé."""
+
+    @abstractmethod
+    def finish(self) -> bytes:
+        """Termine le flux compressé et renvoie les derniers octets."""
+
+
+class GzipCompressor(Compressor):
+    def __init__(self, level: int):
+        # wbits 16 + MAX_WBITS : en-tête et somme de contrôle gzip
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        output = self._compressor.compress(data)
+        return output + self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else output
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor(Compressor):
+    def __init__(self, level: int):
+        import brotli
+
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        output = self._compressor.process(data)
+        return output + self._compressor.flush() if flush else output
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdCompressor(Compressor):
+    def __init__(self, level: int):
+        import zstandard
+
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        output = self._compressor.compress(data)
+        return output + self._compressor.flush(self._flush_block) if flush else output
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+COMPRESSORS = {"gzip": GzipCompressor, "br": BrotliCompressor, "zstd": ZstdCompressor}
+
+
+@lru_cache(maxsize=1)
+def available_encodings() -> Tuple[str, ...]:
+    """
+    Encodages utilisables, par ordre de préférence du serveur. Les modules optionnels ne sont
+    importés qu'au premier appel, pour ne pas ralentir le démarrage.
+    """
+    encodings = []
+    for encoding, module in (("zstd", "zstandard"), ("br", "brotli")):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        encodings.append(encoding)
+    encodings.append("gzip")
+    return tuple(encodings)
+
+
+def default_levels() -> Dict[str, int]:
+    """Niveaux de compression configurés, par encodage."""
+    return {
+        "gzip": settings.compression_gzip_level,
+        "br": settings.compression_brotli_level,
+        "zstd": settings.compression_zstd_level,
+    }
+
+
+def negotiate_encoding(accept_encoding: str, encodings: Iterable[str]) -> Optional[str]:
+    """
+    Choisit l'encodage de la réponse d'après l'en-tête Accept-Encoding.
+
+    Args:
+        accept_encoding (str): Valeur de l'en-tête, ex. `gzip, br;q=0.8`.
+        encodings (Iterable[str]): Encodages disponibles, par ordre de préférence du serveur.
+
+    Returns:
+        Optional[str]: Encodage de plus haute qualité accepté par le client (la préférence du
+            serveur départage les égalités), ou None pour une réponse non compressée.
+    """
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.partition(";")
+        name = name.strip()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI de compression des réponses.
+
+    Remplace GZipMiddleware de Starlette, qui ne propose ni brotli ni zstd et conserve les
+    paquets d'un flux dans son tampon de compression au lieu de les envoyer.
+
+    Args:
+        app: Application ASGI enveloppée.
+        minimum_size (int): Taille minimale, en octets, d'une réponse complète à compresser.
+        levels (Optional[Dict[str, int]]): Niveau de compression par encodage.
+        encodings (Optional[Iterable[str]]): Encodages proposés (par défaut : tous ceux installés).
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, levels: Optional[Dict[str, int]] = None,
+                 encodings: Optional[Iterable[str]] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {**default_levels(), **(levels or {})}
+        self.encodings = tuple(encodings) if encodings is not None else None
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate_encoding(accept_encoding, self.encodings or available_encodings()) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[dict] = None
+        compressor: Optional[Compressor] = None
+        passthrough = False
+
+        async def send_wrapper(message) -> None:
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                if not _should_compress(message["status"], headers):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # En attente du premier paquet : sa taille décide de la compression
+                    start_message = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = start_message.get("headers", [])
+                if not more_body:
+                    passthrough = True
+                    if len(body) < self.minimum_size:
+                        # Réponse complète trop petite : le gain ne compense pas le coût
+                        await send({**start_message, "headers": _add_vary(headers)})
+                        await send(message)
+                        return
+                    # Réponse complète : compressée d'un bloc, avec sa taille
+                    compressor = COMPRESSORS[encoding](self.levels[encoding])
+                    data = compressor.compress(body, flush=False) + compressor.finish()
+                    headers = _compressed_headers(headers, encoding)
+                    headers.append((b"content-length", str(len(data)).encode("latin-1")))
+                    await send({**start_message, "headers": headers})
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                compressor = COMPRESSORS[encoding](self.levels[encoding])
+                await send({**start_message, "headers": _compressed_headers(headers, encoding)})
+
+            if more_body:
+                # Paquet d'un flux : vidé immédiatement pour rester progressif
+                data = compressor.compress(body, flush=True)
+                if data:
+                    await send({"type": "http.response.body", "body": data, "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": compressor.compress(body, flush=False) + compressor.finish()})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _should_compress(status: int, headers: List[Tuple[bytes, bytes]]) -> bool:
+    """Indique si une réponse peut être compressée, d'après son statut et ses en-têtes."""
+    if status < 200 or status in (204, 304):
+        return False
+    content_type = b""
+    for name, value in headers:
+        if name == b"content-encoding":
+            return False
+        if name == b"content-type":
+            content_type = value
+    return content_type.decode("latin-1").startswith(COMPRESSIBLE_TYPES)
+
+
+def _add_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    """Ajoute Accept-Encoding à l'en-tête Vary : les caches distinguent les deux variantes."""
+    headers = list(headers)
+    for index, (name, value) in enumerate(headers):
+        if name == b"vary":
+            if b"accept-encoding" not in value.lower():
+                headers[index] = (name, value + b", Accept-Encoding")
+            return headers
+    headers.append((b"vary", b"Accept-Encoding"))
+    return headers
+
+
+def _compressed_headers(headers: List[Tuple[bytes, bytes]], encoding: str) -> List[Tuple[bytes, bytes]]:
+    """En-têtes d'une réponse compressée : Content-Encoding, sans Content-Length, ETag faible."""
+    result = []
+    for name, value in _add_vary(headers):
+        if name == b"content-length":
+            # Taille inconnue avant la fin de la compression : envoi par morceaux
+            continue
+        if name == b"etag" and not value.startswith(b"W/"):
+            # Les octets diffèrent de la version non compressée : l'ETag fort devient faible
+            # (etag_matches ignore le préfixe W/, If-None-Match et If-Match restent valides)
+            value = b"W/" + value
+        result.append((name, value))
+    result.append((b"content-encoding", encoding.encode("latin-1")))
+    return result
@@ -1,6 +1,14 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
-from typing import Optional
+from typing import Literal, Optional
+
+
+# Pilotes asynchrones utilisés à la place des pilotes synchrones
+ASYNC_DRIVERS = {
+    "mssql+pyodbc": "mssql+aioodbc",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
 
 
 class Settings(BaseSettings):
@@ -9,24 +17,95 @@ class Settings(BaseSettings):
     secret_key: str = Field(..., env="SECRET_KEY")  # Clé secrète pour JWT
     algorithm: str = Field(default="HS256", env="ALGORITHM")  # Algorithme pour JWT
     access_token_expire_minutes: int = Field(default=30, env="ACCESS_TOKEN_EXPIRE_MINUTES")  # Durée de validité des tokens
+    jwt_backend: Literal["jose", "hs256"] = Field(default="jose", env="JWT_BACKEND")  # Implémentation JWT
+    token_cache_size: int = Field(default=10000, env="TOKEN_CACHE_SIZE")  # Tokens validés mémorisés (0 = désactivé)
 
-    # Informations pour la base de données
-    server_name: str = Field(..., env="SERVER_NAME")  # Nom du serveur
-    bdd_name: str = Field(..., env="BDD_NAME")  # Nom de la base de données
-    user: str = Field(..., env="USER")  # Utilisateur pour la base de données
-    mdp: str = Field(..., env="MDP")  # Mot de passe pour la base de données
+    # Informations pour la base de données (facultatives si DB_URL est défini)
+    server_name: Optional[str] = Field(default=None, env="SERVER_NAME")  # Nom du serveur
+    bdd_name: Optional[str] = Field(default=None, env="BDD_NAME")  # Nom de la base de données
+    user: Optional[str] = Field(default=None, env="USER")  # Utilisateur pour la base de données
+    mdp: Optional[str] = Field(default=None, env="MDP")  # Mot de passe pour la base de données
     port: int = Field(default=1433, env="PORT")  # Port utilisé par le serveur
+    db_url: Optional[str] = Field(default=None, env="DB_URL")  # URL SQLAlchemy complète (ex. sqlite:///local.db), prioritaire
+    db_async: bool = Field(default=True, env="DB_ASYNC")  # Engine asynchrone (False : engine synchrone dans un pool de threads)
+    db_echo: bool = Field(default=False, env="DB_ECHO")  # Journalise chaque requête SQL (développement uniquement)
+
+    # Pool de connexions à la base de données
+    db_pool_size: int = Field(default=5, env="DB_POOL_SIZE")  # Connexions conservées ouvertes
+    db_max_overflow: int = Field(default=10, env="DB_MAX_OVERFLOW")  # Connexions supplémentaires autorisées en pic
+    db_pool_timeout: int = Field(default=30, env="DB_POOL_TIMEOUT")  # Attente maximale d'une connexion libre (secondes)
+    db_pool_recycle: int = Field(default=1800, env="DB_POOL_RECYCLE")  # Durée de vie maximale d'une connexion (secondes)
+    db_pool_pre_ping: bool = Field(default=True, env="DB_POOL_PRE_PING")  # Vérifie la connexion avant de la réutiliser
+    db_connection_budget: int = Field(default=0, env="DB_CONNECTION_BUDGET")  # Connexions max. pour l'ensemble des workers (0 = pas de partage)
+
+    # Serveur multi-processus (python -m app serve)
+    web_workers: int = Field(default=1, env="WEB_WORKERS")  # Nombre de processus workers (renseigné par `serve --workers`)
+    health_endpoints_enabled: bool = Field(default=False, env="HEALTH_ENDPOINTS_ENABLED")  # Active les routes /health/*
+
+    # Mesures de performance
+    metrics_enabled: bool = Field(default=False, env="METRICS_ENABLED")  # Mesure chaque requête et expose GET /metrics (Prometheus, sans authentification)
+    server_timing_enabled: bool = Field(default=False, env="SERVER_TIMING_ENABLED")  # Ajoute l'en-tête Server-Timing aux réponses
+    slow_query_threshold_ms: float = Field(default=500.0, env="SLOW_QUERY_THRESHOLD_MS")  # Journalise les requêtes SQL plus lentes (0 = désactivé)
+
+    # Pagination de la liste des produits
+    page_size_default: int = Field(default=100, env="PAGE_SIZE_DEFAULT")  # Taille de page par défaut
+    page_size_max: int = Field(default=1000, env="PAGE_SIZE_MAX")  # Taille de page maximale
+    stream_chunk_size: int = Field(default=500, env="STREAM_CHUNK_SIZE")  # Lignes lues par paquet en mode streaming
+    fast_json: bool = Field(default=False, env="FAST_JSON")  # Sérialisation rapide : lignes SQL brutes encodées avec orjson
+    changes_settle_seconds: float = Field(default=2.0, env="CHANGES_SETTLE_SECONDS")  # Modifications plus récentes différées à la synchronisation suivante
+    batch_get_max_ids: int = Field(default=1000, env="BATCH_GET_MAX_IDS")  # Identifiants maximum par lecture groupée (POST /products/batch-get)
+    write_batch_enabled: bool = Field(default=False, env="WRITE_BATCH_ENABLED")  # Regroupe les créations et mises à jour simultanées en une transaction
+    write_batch_window_ms: float = Field(default=5.0, env="WRITE_BATCH_WINDOW_MS")  # Attente maximale d'une écriture avant l'envoi du lot (millisecondes)
+    write_batch_max_items: int = Field(default=100, env="WRITE_BATCH_MAX_ITEMS")  # Écritures par lot au maximum
+    bulk_batch_size: int = Field(default=1000, env="BULK_BATCH_SIZE")  # Lignes par lot d'import (validation, écriture groupée et commit)
+
+    # Cache des produits consultés par ID
+    product_cache_enabled: bool = Field(default=True, env="PRODUCT_CACHE_ENABLED")  # Active le cache en lecture
+    product_cache_size: int = Field(default=10000, env="PRODUCT_CACHE_SIZE")  # Nombre maximal de produits en cache
+    product_cache_ttl: float = Field(default=60.0, env="PRODUCT_CACHE_TTL")  # Durée de vie d'une entrée (secondes)
+    stats_cache_enabled: bool = Field(default=True, env="STATS_CACHE_ENABLED")  # Mémorise les statistiques du catalogue jusqu'à la prochaine écriture
+    stats_cache_ttl: float = Field(default=60.0, env="STATS_CACHE_TTL")  # Délai de prise en compte des écritures des autres workers (secondes)
+    compression_enabled: bool = Field(default=True, env="COMPRESSION_ENABLED")  # Compression des réponses (Accept-Encoding)
+    compression_minimum_size: int = Field(default=1024, env="COMPRESSION_MINIMUM_SIZE")  # Taille minimale d'une réponse compressée (octets)
+    compression_gzip_level: int = Field(default=5, env="COMPRESSION_GZIP_LEVEL")  # Niveau gzip (1 à 9)
+    compression_brotli_level: int = Field(default=4, env="COMPRESSION_BROTLI_LEVEL")  # Niveau brotli (0 à 11), si le paquet brotli est installé
+    compression_zstd_level: int = Field(default=3, env="COMPRESSION_ZSTD_LEVEL")  # Niveau zstd (1 à 22), si le paquet zstandard est installé
+    search_backend: str = Field(default="auto", env="SEARCH_BACKEND")  # Recherche : auto, memory (index en mémoire) ou fulltext (SQL Server)
+    search_refresh_seconds: float = Field(default=5.0, env="SEARCH_REFRESH_SECONDS")  # Relecture des modifications des autres workers par l'index (0 = jamais)
+    singleflight_enabled: bool = Field(default=True, env="SINGLEFLIGHT_ENABLED")  # Regroupe les lectures identiques simultanées en une requête SQL
+    singleflight_timeout: float = Field(default=5.0, env="SINGLEFLIGHT_TIMEOUT")  # Attente maximale d'une lecture partagée (secondes, 503 au-delà)
+    product_cache_control: str = Field(default="private, no-cache", env="PRODUCT_CACHE_CONTROL")  # En-tête Cache-Control des lectures
 
     # Mot de passe hashé pour l'utilisateur (authentification)
     hashed_password: str = Field(..., env="HASHED_PASSWORD")  # Mot de passe hashé récupéré depuis .env
 
+    # Vérification des mots de passe sur /token
+    password_workers: int = Field(default=4, env="PASSWORD_WORKERS")  # Threads dédiés à bcrypt
+    password_max_pending: int = Field(default=32, env="PASSWORD_MAX_PENDING")  # Vérifications simultanées avant refus (429)
+    login_cache_ttl: float = Field(default=0, env="LOGIN_CACHE_TTL")  # Mémorisation des connexions réussies (secondes, 0 = désactivée)
+    login_cache_size: int = Field(default=1024, env="LOGIN_CACHE_SIZE")  # Nombre maximal de connexions mémorisées
+
+    # Utilisateurs
+    bootstrap_username: str = Field(default="testuser", env="BOOTSTRAP_USERNAME")  # Compte défini par HASHED_PASSWORD, hors table ApiUser
+    bootstrap_role: str = Field(default="admin", env="BOOTSTRAP_ROLE")  # Rôle de ce compte (admin ou reader)
+    token_revocation_check: bool = Field(default=False, env="TOKEN_REVOCATION_CHECK")  # Vérifie que le compte est actif et le token non révoqué
+    user_cache_ttl: float = Field(default=30.0, env="USER_CACHE_TTL")  # Durée de mémorisation de l'état des comptes (secondes)
+    user_cache_size: int = Field(default=10000, env="USER_CACHE_SIZE")  # Nombre maximal de comptes mémorisés
+
     @property
     def database_url(self) -> str:
+        if self.db_url:
+            return self.db_url
         return (
             f"mssql+pyodbc://{self.user}:{self.mdp}@{self.server_name}:{self.port}/"
             f"{self.bdd_name}?driver=ODBC+Driver+18+for+SQL+Server&timeout=60"
         ).replace(" ", "+")
 
+    @property
+    def async_database_url(self) -> str:
+        """URL de la base avec le pilote asynchrone correspondant au pilote synchrone."""
+        scheme, separator, rest = self.database_url.partition("://")
+        return ASYNC_DRIVERS.get(scheme, scheme) + separator + rest
 
     class Config:
         # Charge les variables d'environnement depuis le fichier .env
@@ -44,7 +123,7 @@ class Settings(BaseSettings):
             raise ValueError("La clé secrète 'secret_key' est manquante dans le fichier .env.")
         
         # Vérifie si les informations pour la base de données sont définies
-        if not all([self.server_name, self.bdd_name, self.user, self.mdp]):
+        if not self.db_url and not all([self.server_name, self.bdd_name, self.user, self.mdp]):
             raise ValueError("Certaines informations essentielles pour la base de données manquent dans le fichier .env.")
         
         # Vérifie la configuration du mot de passe haché
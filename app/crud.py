@@ -0,0 +1,928 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Tuple
+import base64
+import json
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, func, insert, or_, text, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import aliased, joinedload
+from sqlmodel import Session, select
+from app.config import settings
+from app.database import get_engine
+from app.http_cache import etag_matches, product_etag
+from app.models import (
+    Product, ProductCategory, ProductCreate, ProductFilters, ProductModel, ProductSummary, ProductTombstone, User,
+)
+
+# Fonctions d'accès aux données, synchrones : les routes les exécutent via
+# `await session.run_sync(...)`, dans le contexte asynchrone de l'engine ou dans un thread.
+
+
+class PreconditionFailed(Exception):
+    """L'ETag fourni dans If-Match ne correspond plus à la version du produit en base."""
+
+
+# Colonnes de tri autorisées (toutes NOT NULL en base, condition du tri par curseur)
+SORTABLE_COLUMNS = {"ProductID", "Name", "ProductNumber", "ListPrice", "StandardCost", "SellStartDate", "ModifiedDate"}
+
+# Colonnes pouvant être sélectionnées avec `fields`
+PRODUCT_COLUMNS = frozenset(Product.__table__.columns.keys())
+ALL_COLUMNS = list(Product.__table__.columns.keys())
+
+# Colonnes de la vue allégée (`view=summary`)
+SUMMARY_COLUMNS = list(ProductSummary.model_fields)
+
+# Identifiants par clause IN : SQL Server refuse plus de 2100 paramètres par requête
+IN_CLAUSE_CHUNK = 2000
+
+# Relations pouvant être incluses dans les réponses avec `expand`
+EXPANDABLE_RELATIONS = {"category": Product.Category, "model": Product.Model}
+
+
+def expand_options(expand: FrozenSet[str]) -> list:
+    """
+    Construit les options de chargement des relations demandées.
+
+    Category et Model sont des relations plusieurs-à-un : une jointure les charge dans la
+    même requête que les produits, quel que soit le nombre de lignes (pas de N+1).
+    """
+    return [joinedload(EXPANDABLE_RELATIONS[name]) for name in sorted(expand)]
+
+
+def serialize_product(product: Product, expand: FrozenSet[str] = frozenset()) -> Dict[str, Any]:
+    """
+    Sérialise un produit en dictionnaire, avec les relations demandées.
+
+    Args:
+        product (Product): Produit à sérialiser.
+        expand (FrozenSet[str]): Relations à inclure (`category`, `model`).
+
+    Returns:
+        Dict[str, Any]: Colonnes du produit, plus `Category` / `Model` si demandés.
+    """
+    payload = product.model_dump()
+    if "category" in expand:
+        payload["Category"] = product.Category.model_dump() if product.Category else None
+    if "model" in expand:
+        payload["Model"] = product.Model.model_dump() if product.Model else None
+    return payload
+
+
+def apply_product_filters(statement, filters: Optional[ProductFilters]):
+    """
+    Ajoute les filtres de la liste des produits à la clause WHERE d'une requête.
+
+    Args:
+        statement: Requête SELECT sur la table Product.
+        filters (Optional[ProductFilters]): Filtres demandés.
+
+    Returns:
+        La requête filtrée.
+    """
+    if filters is None:
+        return statement
+    if filters.category_id is not None:
+        statement = statement.where(Product.ProductCategoryID == filters.category_id)
+    if filters.min_price is not None:
+        statement = statement.where(Product.ListPrice >= filters.min_price)
+    if filters.max_price is not None:
+        statement = statement.where(Product.ListPrice <= filters.max_price)
+    if filters.color is not None:
+        statement = statement.where(Product.Color == filters.color)
+    if filters.active is not None:
+        statement = statement.where(Product.SellEndDate.is_(None) if filters.active else Product.SellEndDate.is_not(None))
+    if filters.name_prefix:
+        # LIKE 'préfixe%' : utilisable par l'index sur Name
+        statement = statement.where(Product.Name.startswith(filters.name_prefix, autoescape=True))
+    return statement
+
+
+def apply_keyset(statement, sort: str, after: Optional[int]):
+    """
+    Trie la requête et la positionne après le produit `after` (pagination par curseur).
+
+    Le curseur reste un ProductID : pour un tri sur une autre colonne, la valeur de tri du
+    produit `after` est relue par une sous-requête, et ProductID départage les égalités.
+    Si ce produit a été supprimé entre deux pages, la page suivante est vide.
+
+    Args:
+        statement: Requête SELECT sur la table Product.
+        sort (str): Colonne de tri, préfixée par `-` pour un tri décroissant.
+        after (Optional[int]): ProductID du dernier produit de la page précédente.
+
+    Returns:
+        La requête triée et positionnée.
+    """
+    descending = sort.startswith("-")
+    column = Product.__table__.c[sort.lstrip("-")]
+    product_id = Product.__table__.c.ProductID
+
+    if column is product_id:
+        order_by = [product_id.desc() if descending else product_id]
+    else:
+        order_by = [column.desc(), product_id.desc()] if descending else [column, product_id]
+    statement = statement.order_by(*order_by)
+
+    if after is not None:
+        if column is product_id:
+            statement = statement.where(product_id < after if descending else product_id > after)
+        else:
+            anchor = select(column).where(product_id == after).scalar_subquery()
+            if descending:
+                statement = statement.where(or_(column < anchor, and_(column == anchor, product_id < after)))
+            else:
+                statement = statement.where(or_(column > anchor, and_(column == anchor, product_id > after)))
+    return statement
+
+
+def get_products_page(
+    session: Session,
+    after: Optional[int],
+    limit: int,
+    expand: FrozenSet[str] = frozenset(),
+    filters: Optional[ProductFilters] = None,
+    sort: str = "ProductID",
+    fields: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Récupère une page de produits avec une pagination par curseur (keyset).
+
+    Args:
+        session (Session): Session de base de données.
+        after (Optional[int]): Dernier ProductID de la page précédente.
+        limit (int): Nombre maximal de produits à renvoyer.
+        expand (FrozenSet[str]): Relations à inclure dans chaque produit.
+        filters (Optional[ProductFilters]): Filtres de la clause WHERE.
+        sort (str): Colonne de tri, préfixée par `-` pour un tri décroissant.
+        fields (Optional[List[str]]): Colonnes à sélectionner ; les lignes sont alors renvoyées
+            telles que lues (tuples SQL), sans construire d'objets ORM.
+
+    Returns:
+        Dict[str, Any]: Produits de la page (`items`) et curseur de la page suivante (`next_cursor`).
+    """
+    if fields:
+        # Projection : seules les colonnes demandées (et ProductID pour le curseur) sont lues
+        columns = ["ProductID", *(name for name in fields if name != "ProductID")]
+        statement = select(*(Product.__table__.c[name] for name in columns))
+    else:
+        statement = select(Product).options(*expand_options(expand))
+    statement = apply_keyset(apply_product_filters(statement, filters), sort, after)
+
+    # Une ligne de plus que demandé permet de savoir s'il existe une page suivante
+    rows = session.exec(statement.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].ProductID
+
+    if fields:
+        items = [dict(row._mapping) for row in rows]
+    else:
+        items = [serialize_product(product, expand) for product in rows]
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def get_product(session: Session, product_id: int, expand: FrozenSet[str] = frozenset()) -> Optional[Dict[str, Any]]:
+    """Récupère un produit sérialisé par son ID, ou None s'il n'existe pas."""
+    product = session.get(Product, product_id, options=expand_options(expand))
+    return serialize_product(product, expand) if product else None
+
+
+def get_products_by_ids(session: Session, product_ids: List[int],
+                        expand: FrozenSet[str] = frozenset()) -> Dict[int, Dict[str, Any]]:
+    """
+    Récupère plusieurs produits sérialisés en une requête `WHERE ProductID IN (...)`,
+    découpée par paquets de IN_CLAUSE_CHUNK identifiants.
+
+    Args:
+        session (Session): Session de base de données.
+        product_ids (List[int]): Identifiants recherchés, sans doublons.
+        expand (FrozenSet[str]): Relations à inclure (`category`, `model`).
+
+    Returns:
+        Dict[int, Dict[str, Any]]: Produits trouvés, indexés par ProductID (les absents sont omis).
+    """
+    found: Dict[int, Dict[str, Any]] = {}
+    for start in range(0, len(product_ids), IN_CLAUSE_CHUNK):
+        chunk = product_ids[start:start + IN_CLAUSE_CHUNK]
+        statement = select(Product).options(*expand_options(expand)).where(Product.ProductID.in_(chunk))
+        for product in session.exec(statement):
+            found[product.ProductID] = serialize_product(product, expand)
+    return found
+
+
+def get_product_version(session: Session, product_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Lit uniquement le rowguid et la date de modification d'un produit.
+
+    Suffit à calculer son ETag et à répondre 304 sans lire ni sérialiser la ligne complète.
+    """
+    row = session.execute(
+        select(Product.rowguid, Product.ModifiedDate).where(Product.ProductID == product_id)
+    ).first()
+    return dict(row._mapping) if row else None
+
+
+def get_listing_version(session: Session, filters: Optional[ProductFilters] = None) -> Dict[str, Any]:
+    """
+    Calcule la version agrégée des produits correspondant aux filtres.
+
+    Le nombre de lignes, la date de modification la plus récente et le plus grand ProductID
+    changent à chaque création, modification ou suppression.
+
+    Returns:
+        Dict[str, Any]: `count`, `last_modified` et `max_id`.
+    """
+    statement = apply_product_filters(
+        select(func.count(), func.max(Product.ModifiedDate), func.max(Product.ProductID)).select_from(Product),
+        filters,
+    )
+    count, last_modified, max_id = session.execute(statement).one()
+    return {"count": count, "last_modified": last_modified, "max_id": max_id}
+
+
+def _check_if_match(product: Product, if_match: Optional[str]) -> None:
+    """Lève PreconditionFailed si If-Match ne correspond pas à la version du produit."""
+    if if_match is not None and not etag_matches(if_match, product_etag(product.model_dump())):
+        raise PreconditionFailed()
+
+
+def create_product(session: Session, product: ProductCreate) -> Product:
+    """
+    Insère un nouveau produit et le renvoie avec ses valeurs générées par la base.
+
+    La ligne insérée est relue dans la même requête (RETURNING, OUTPUT INSERTED.* sous
+    SQL Server) plutôt que par un `refresh` après le commit.
+
+    Args:
+        session (Session): Session de base de données.
+        product (ProductCreate): Détails du produit à créer.
+
+    Returns:
+        Product: Produit créé.
+    """
+    new_product = session.scalars(
+        insert(Product).returning(Product), [{**product.model_dump(), "ModifiedDate": datetime.utcnow()}]
+    ).one()
+    # Détaché avant le commit : reste lisible sans nouvelle requête
+    session.expunge(new_product)
+    session.commit()
+    return new_product
+
+
+def update_product(
+    session: Session, product_id: int, product: ProductCreate, if_match: Optional[str] = None
+) -> Optional[Product]:
+    """
+    Met à jour un produit existant avec les champs fournis.
+
+    Args:
+        session (Session): Session de base de données.
+        product_id (int): ID du produit à modifier.
+        product (ProductCreate): Détails du produit à mettre à jour.
+        if_match (Optional[str]): En-tête If-Match ; la ligne est alors verrouillée pendant la vérification.
+
+    Returns:
+        Optional[Product]: Produit mis à jour, ou None s'il n'existe pas.
+
+    Raises:
+        PreconditionFailed: Si le produit a été modifié depuis la version indiquée par If-Match.
+    """
+    if if_match is not None:
+        existing_product = session.get(Product, product_id, with_for_update=True)
+        if not existing_product:
+            return None
+        _check_if_match(existing_product, if_match)
+
+    values = product.model_dump(exclude_unset=True)
+    # La date de modification est gérée par l'API : elle détermine l'ETag du produit
+    values["ModifiedDate"] = datetime.utcnow()
+    # UPDATE ... RETURNING : la ligne modifiée est relue dans la même requête
+    updated_product = session.scalars(
+        update(Product).where(Product.ProductID == product_id).values(**values).returning(Product)
+    ).first()
+    if updated_product is None:
+        session.rollback()
+        return None
+    session.expunge(updated_product)
+    session.commit()
+    return updated_product
+
+
+class ProductWrite(NamedTuple):
+    """
+    Écriture d'un produit regroupée avec d'autres par le WriteBatcher.
+
+    Attributes:
+        product (ProductCreate): Détails du produit.
+        product_id (Optional[int]): None pour une création, ID du produit pour une mise à jour.
+        if_match (Optional[str]): En-tête If-Match d'une mise à jour.
+    """
+    product: ProductCreate
+    product_id: Optional[int] = None
+    if_match: Optional[str] = None
+
+
+def apply_product_writes(session: Session, writes: List[ProductWrite]) -> List[Any]:
+    """
+    Applique un lot de créations et de mises à jour dans une seule transaction.
+
+    Si le lot échoue (contrainte d'unicité, erreur SQL...), chaque écriture est rejouée dans sa
+    propre transaction : seules les écritures fautives échouent.
+
+    Args:
+        session (Session): Session de base de données.
+        writes (List[ProductWrite]): Écritures, dans l'ordre d'arrivée.
+
+    Returns:
+        List[Any]: Pour chaque écriture, dans le même ordre : le produit créé ou modifié, None
+            si le produit à modifier n'existe pas, ou l'exception à renvoyer à l'appelant
+            (PreconditionFailed, erreur SQL).
+    """
+    try:
+        results = _apply_product_writes(session, writes)
+        session.commit()
+        return results
+    except SQLAlchemyError as e:
+        session.rollback()
+        if len(writes) == 1:
+            return [e]
+
+    results = []
+    for write in writes:
+        try:
+            results.extend(_apply_product_writes(session, [write]))
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            results.append(e)
+    return results
+
+
+def _apply_product_writes(session: Session, writes: List[ProductWrite]) -> List[Any]:
+    """
+    Envoie les écritures d'un lot sans valider la transaction : une insertion multi-lignes avec
+    RETURNING pour les créations, une lecture `IN (...)` puis une mise à jour groupée par clé
+    primaire pour les modifications, suivie de la relecture des lignes enregistrées.
+    """
+    modified_date = datetime.utcnow()
+    results: List[Any] = [None] * len(writes)
+
+    creates = [index for index, write in enumerate(writes) if write.product_id is None]
+    if creates:
+        created = session.scalars(
+            insert(Product).returning(Product, sort_by_parameter_order=True),
+            [{**writes[index].product.model_dump(), "ModifiedDate": modified_date} for index in creates],
+        ).all()
+        for index, product in zip(creates, created):
+            session.expunge(product)
+            results[index] = product
+
+    updates = [index for index, write in enumerate(writes) if write.product_id is not None]
+    if updates:
+        statement = select(Product.__table__).where(Product.ProductID.in_({writes[index].product_id for index in updates}))
+        if any(writes[index].if_match is not None for index in updates):
+            statement = statement.with_for_update()
+        rows = {row.ProductID: dict(row._mapping) for row in session.execute(statement)}
+
+        changed: Dict[int, Dict[str, Any]] = {}
+        # État du produit après chaque écriture, par position dans le lot
+        states: Dict[int, Dict[str, Any]] = {}
+        # Dans l'ordre d'arrivée : deux mises à jour du même produit s'appliquent l'une après l'autre
+        for index in updates:
+            write = writes[index]
+            row = rows.get(write.product_id)
+            if row is None:
+                continue
+            if write.if_match is not None and not etag_matches(write.if_match, product_etag(row)):
+                results[index] = PreconditionFailed()
+                continue
+            row.update(write.product.model_dump(exclude_unset=True), ModifiedDate=modified_date)
+            changed[write.product_id] = row
+            states[index] = dict(row)
+        if changed:
+            session.execute(update(Product), list(changed.values()))
+            # Valeurs enregistrées (dates arrondies et converties par la base) : l'ETag renvoyé
+            # doit être celui de la lecture suivante
+            stored = {
+                row.ProductID: dict(row._mapping)
+                for row in session.execute(select(Product.__table__).where(Product.ProductID.in_(changed)))
+            }
+            for index, state in states.items():
+                row = stored[state["ProductID"]]
+                if state != changed[state["ProductID"]]:
+                    # Écriture suivie d'une autre sur le même produit dans le lot : son état n'a
+                    # jamais été enregistré, seule la date de modification vient de la base
+                    row = {**state, "ModifiedDate": row["ModifiedDate"]}
+                results[index] = Product.model_validate(row)
+    return results
+
+
+def delete_product(session: Session, product_id: int, if_match: Optional[str] = None) -> bool:
+    """
+    Supprime un produit existant.
+
+    Returns:
+        bool: True si le produit a été supprimé, False s'il n'existe pas.
+
+    Raises:
+        PreconditionFailed: Si le produit a été modifié depuis la version indiquée par If-Match.
+    """
+    product = session.get(Product, product_id, with_for_update=if_match is not None)
+    if not product:
+        return False
+    _check_if_match(product, if_match)
+
+    # Trace de suppression pour le flux des modifications, dans la même transaction
+    session.add(ProductTombstone(ProductID=product.ProductID, ProductNumber=product.ProductNumber))
+    session.delete(product)
+    session.commit()
+    return True
+
+
+def upsert_products(
+    session: Session, products: List[ProductCreate]
+) -> Tuple[List[Tuple[str, Optional[int]]], List[Dict[str, Any]]]:
+    """
+    Insère ou met à jour un lot de produits, identifiés par leur ProductNumber, puis valide la transaction.
+
+    Les insertions et les mises à jour sont envoyées en deux requêtes groupées (insertion
+    multi-lignes avec RETURNING, pour connaître les ProductID créés, et executemany accéléré par
+    `fast_executemany` avec pyodbc). Si un ProductNumber apparaît plusieurs fois dans le lot,
+    seule la dernière occurrence est appliquée.
+
+    Args:
+        session (Session): Session de base de données.
+        products (List[ProductCreate]): Produits validés du lot.
+
+    Returns:
+        Tuple[List[Tuple[str, Optional[int]]], List[Dict[str, Any]]]: Pour chaque produit, son
+            statut (`created`, `updated` ou `duplicate`) et son ProductID ; et les colonnes
+            recherchables (SEARCH_COLUMNS) des produits écrits, pour l'index de recherche.
+    """
+    numbers = [product.ProductNumber for product in products]
+    current: Dict[str, Dict[str, Any]] = {
+        row.ProductNumber: dict(row._mapping)
+        for row in session.execute(
+            select(*(Product.__table__.c[name] for name in SEARCH_COLUMNS))
+            .where(Product.ProductNumber.in_(set(numbers)))
+        )
+    }
+    existing: Dict[str, int] = {number: row["ProductID"] for number, row in current.items()}
+    # Dernière occurrence de chaque ProductNumber dans le lot
+    last_index = {number: index for index, number in enumerate(numbers)}
+
+    modified_date = datetime.utcnow()
+    inserts, updates, statuses, documents = [], [], [], []
+    for index, product in enumerate(products):
+        number = product.ProductNumber
+        if last_index[number] != index:
+            statuses.append("duplicate")
+        elif number in existing:
+            values = product.model_dump(exclude_unset=True)
+            values["ProductID"] = existing[number]
+            values["ModifiedDate"] = modified_date
+            updates.append(values)
+            statuses.append("updated")
+            # Les colonnes absentes du produit importé gardent leur valeur en base
+            documents.append({name: values.get(name, current[number][name]) for name in SEARCH_COLUMNS})
+        else:
+            inserts.append({**product.model_dump(), "ModifiedDate": modified_date})
+            statuses.append("created")
+
+    if inserts:
+        created = session.execute(
+            insert(Product).returning(*(Product.__table__.c[name] for name in SEARCH_COLUMNS), sort_by_parameter_order=True),
+            inserts,
+        ).all()
+        for row in created:
+            existing[row.ProductNumber] = row.ProductID
+            documents.append(dict(row._mapping))
+    if updates:
+        session.execute(update(Product), updates)
+    session.commit()
+    return [(row_status, existing.get(number)) for row_status, number in zip(statuses, numbers)], documents
+
+
+def get_user_by_username(session: Session, username: str) -> Optional[Dict[str, Any]]:
+    """
+    Recherche un utilisateur par son nom (index unique UX_ApiUser_Username).
+
+    Args:
+        session (Session): Session de base de données.
+        username (str): Nom d'utilisateur.
+
+    Returns:
+        Optional[Dict[str, Any]]: Colonnes de l'utilisateur, ou None s'il n'existe pas.
+    """
+    user = session.exec(select(User).where(User.Username == username)).first()
+    return user.model_dump() if user else None
+
+
+def create_user(session: Session, username: str, hashed_password: str, role: str, scopes: str = "") -> User:
+    """
+    Crée un utilisateur.
+
+    Args:
+        session (Session): Session de base de données.
+        username (str): Nom d'utilisateur (unique).
+        hashed_password (str): Mot de passe haché avec bcrypt.
+        role (str): Rôle de l'utilisateur (voir app.auth.auth.ROLE_SCOPES).
+        scopes (str): Scopes supplémentaires, séparés par des espaces.
+
+    Returns:
+        User: Utilisateur créé.
+    """
+    user = User(Username=username, HashedPassword=hashed_password, Role=role, Scopes=scopes)
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return user
+
+
+def revoke_user_tokens(session: Session, username: str) -> bool:
+    """
+    Révoque tous les tokens d'un utilisateur en incrémentant sa version de token.
+
+    Args:
+        session (Session): Session de base de données.
+        username (str): Nom d'utilisateur.
+
+    Returns:
+        bool: True si l'utilisateur existe.
+    """
+    result = session.execute(
+        update(User)
+        .where(User.Username == username)
+        .values(TokenVersion=User.TokenVersion + 1, ModifiedDate=datetime.utcnow())
+    )
+    session.commit()
+    return result.rowcount > 0
+
+
+def iter_products_ndjson(
+    after: Optional[int] = None, chunk_size: Optional[int] = None, filters: Optional[ProductFilters] = None
+) -> Iterator[str]:
+    """
+    Génère les produits au format NDJSON, un produit par ligne.
+
+    Les lignes sont lues par paquets via un curseur côté serveur, sans construire
+    d'objets ORM : la mémoire consommée reste constante quelle que soit la taille de la table.
+    La session est ouverte dans le générateur car elle doit vivre aussi longtemps que la réponse ;
+    le générateur est synchrone et Starlette l'itère dans son pool de threads.
+
+    Args:
+        after (Optional[int]): ProductID à partir duquel reprendre la lecture.
+        chunk_size (Optional[int]): Nombre de lignes lues par aller-retour.
+        filters (Optional[ProductFilters]): Filtres de la clause WHERE.
+
+    Yields:
+        str: Un produit sérialisé en JSON suivi d'un saut de ligne.
+    """
+    chunk_size = chunk_size or settings.stream_chunk_size
+    statement = (
+        select(*Product.__table__.columns)
+        .order_by(Product.ProductID)
+        .execution_options(stream_results=True, yield_per=chunk_size)
+    )
+    if after is not None:
+        statement = statement.where(Product.ProductID > after)
+    statement = apply_product_filters(statement, filters)
+
+    with Session(get_engine()) as session:
+        for partition in session.execute(statement).partitions(chunk_size):
+            yield "".join(
+                json.dumps(jsonable_encoder(dict(row._mapping))) + "\n" for row in partition
+            )
+
+
+# Position dans le flux des modifications : (date, identifiant) de la dernière ligne lue, ou
+# (date, None) quand toutes les lignes jusqu'à cette date ont été lues
+Cursor = Optional[Tuple[datetime, Optional[int]]]
+
+
+def encode_watermark(products: Cursor, tombstones: Cursor) -> str:
+    """
+    Encode la position de lecture du flux des modifications en jeton opaque.
+
+    Args:
+        products (Cursor): Position dans les produits (ModifiedDate, ProductID).
+        tombstones (Cursor): Position dans les suppressions (DeletedDate, TombstoneID).
+
+    Returns:
+        str: Jeton base64 (URL) à renvoyer dans `since`.
+    """
+    data = {
+        name: [cursor[0].isoformat(), cursor[1]] if cursor else None
+        for name, cursor in (("p", products), ("d", tombstones))
+    }
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_watermark(token: Optional[str]) -> Tuple[Cursor, Cursor]:
+    """
+    Décode un jeton produit par `encode_watermark`. Sans jeton, le flux part du début.
+
+    Args:
+        token (Optional[str]): Jeton `since`.
+
+    Returns:
+        Tuple[Cursor, Cursor]: Positions dans les produits et dans les suppressions.
+
+    Raises:
+        ValueError: Si le jeton est invalide.
+    """
+    if not token:
+        return None, None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        cursors = []
+        for name in ("p", "d"):
+            value = data[name]
+            if value is None:
+                cursors.append(None)
+            else:
+                date, last_id = value
+                if last_id is not None and not isinstance(last_id, int):
+                    raise TypeError(last_id)
+                cursors.append((datetime.fromisoformat(date), last_id))
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Jeton de synchronisation invalide") from e
+    return cursors[0], cursors[1]
+
+
+def _changes_statement(model, date_column, id_column, cursor: Cursor, horizon: datetime, columns: bool = False):
+    """
+    Requête des lignes modifiées après `cursor` et au plus tard à `horizon`, dans l'ordre
+    (date, identifiant) de l'index correspondant.
+    """
+    statement = select(*model.__table__.columns) if columns else select(model)
+    statement = statement.where(date_column <= horizon).order_by(date_column, id_column)
+    if cursor is not None:
+        date, last_id = cursor
+        if last_id is None:
+            statement = statement.where(date_column > date)
+        else:
+            statement = statement.where(or_(date_column > date, and_(date_column == date, id_column > last_id)))
+    return statement
+
+
+def changes_horizon() -> datetime:
+    """
+    Date limite des modifications renvoyées par le flux.
+
+    ModifiedDate est fixée par l'API avant le commit : une transaction encore en cours peut
+    valider une date antérieure à la dernière date lue. Les modifications des
+    CHANGES_SETTLE_SECONDS dernières secondes sont donc différées à la synchronisation suivante.
+
+    Returns:
+        datetime: Date au-delà de laquelle les modifications ne sont pas encore renvoyées.
+    """
+    return datetime.utcnow() - timedelta(seconds=settings.changes_settle_seconds)
+
+
+def get_product_changes(session: Session, since: Optional[str], limit: int) -> Dict[str, Any]:
+    """
+    Renvoie les produits créés, modifiés ou supprimés depuis le jeton `since`.
+
+    Les produits sont lus par l'index (ModifiedDate, ProductID) et les suppressions par
+    l'index (DeletedDate, TombstoneID), au plus `limit` lignes de chaque.
+
+    Args:
+        session (Session): Session de base de données.
+        since (Optional[str]): Jeton renvoyé par la synchronisation précédente (None : depuis le début).
+        limit (int): Nombre maximal de produits et de suppressions renvoyés.
+
+    Returns:
+        Dict[str, Any]: Modifications (`changes`), nouveau jeton (`watermark`) et `has_more`.
+
+    Raises:
+        ValueError: Si le jeton est invalide.
+    """
+    product_cursor, tombstone_cursor = decode_watermark(since)
+    horizon = changes_horizon()
+
+    products = session.exec(
+        _changes_statement(Product, Product.ModifiedDate, Product.ProductID, product_cursor, horizon).limit(limit + 1)
+    ).all()
+    tombstones = session.exec(
+        _changes_statement(
+            ProductTombstone, ProductTombstone.DeletedDate, ProductTombstone.TombstoneID, tombstone_cursor, horizon
+        ).limit(limit + 1)
+    ).all()
+
+    # Page incomplète : tout a été lu jusqu'à l'horizon, le jeton peut y avancer
+    more_products, more_tombstones = len(products) > limit, len(tombstones) > limit
+    products, tombstones = products[:limit], tombstones[:limit]
+    if more_products:
+        product_cursor = (products[-1].ModifiedDate, products[-1].ProductID)
+    else:
+        product_cursor = (horizon, None)
+    if more_tombstones:
+        tombstone_cursor = (tombstones[-1].DeletedDate, tombstones[-1].TombstoneID)
+    else:
+        tombstone_cursor = (horizon, None)
+
+    changes = [{"op": "upsert", "ProductID": product.ProductID, "product": serialize_product(product)} for product in products]
+    changes.extend(
+        {"op": "delete", "ProductID": tombstone.ProductID, "ProductNumber": tombstone.ProductNumber,
+         "DeletedDate": tombstone.DeletedDate}
+        for tombstone in tombstones
+    )
+    return {
+        "changes": changes,
+        "watermark": encode_watermark(product_cursor, tombstone_cursor),
+        "has_more": more_products or more_tombstones,
+    }
+
+
+def iter_product_changes_ndjson(since: Optional[str], chunk_size: Optional[int] = None) -> Iterator[str]:
+    """
+    Génère toutes les modifications depuis le jeton `since` au format NDJSON, puis une
+    dernière ligne `{"watermark": ...}` contenant le jeton de la synchronisation suivante.
+
+    Comme `iter_products_ndjson`, les lignes sont lues par paquets via un curseur côté
+    serveur dans une session propre au générateur.
+
+    Args:
+        since (Optional[str]): Jeton renvoyé par la synchronisation précédente.
+        chunk_size (Optional[int]): Nombre de lignes lues par aller-retour.
+
+    Yields:
+        str: Une modification sérialisée en JSON suivie d'un saut de ligne.
+
+    Raises:
+        ValueError: Si le jeton est invalide (levée avant la première ligne).
+    """
+    product_cursor, tombstone_cursor = decode_watermark(since)
+    return _iter_product_changes(product_cursor, tombstone_cursor, chunk_size or settings.stream_chunk_size)
+
+
+def _iter_product_changes(product_cursor: Cursor, tombstone_cursor: Cursor, chunk_size: int) -> Iterator[str]:
+    horizon = changes_horizon()
+    streams = (
+        ("upsert", _changes_statement(
+            Product, Product.ModifiedDate, Product.ProductID, product_cursor, horizon, columns=True,
+        )),
+        ("delete", _changes_statement(
+            ProductTombstone, ProductTombstone.DeletedDate, ProductTombstone.TombstoneID, tombstone_cursor, horizon,
+            columns=True,
+        )),
+    )
+
+    with Session(get_engine()) as session:
+        for op, statement in streams:
+            statement = statement.execution_options(stream_results=True, yield_per=chunk_size)
+            for partition in session.execute(statement).partitions(chunk_size):
+                lines = []
+                for row in partition:
+                    values = jsonable_encoder(dict(row._mapping))
+                    if op == "upsert":
+                        change = {"op": op, "ProductID": values["ProductID"], "product": values}
+                    else:
+                        change = {"op": op, "ProductID": values["ProductID"],
+                                  "ProductNumber": values["ProductNumber"], "DeletedDate": values["DeletedDate"]}
+                    lines.append(json.dumps(change) + "\n")
+                yield "".join(lines)
+    yield json.dumps({"watermark": encode_watermark((horizon, None), (horizon, None))}) + "\n"
+
+
+# Colonnes indexées par la recherche (GET /products/search)
+SEARCH_COLUMNS = ("ProductID", "Name", "ProductNumber", "Color")
+
+
+def get_search_documents(session: Session) -> Tuple[List[Tuple[Any, ...]], str]:
+    """
+    Lit les colonnes recherchables de tous les produits pour construire l'index de recherche.
+
+    Args:
+        session (Session): Session de base de données.
+
+    Returns:
+        Tuple[List[Tuple[Any, ...]], str]: Lignes (ProductID, Name, ProductNumber, Color), et
+            jeton du flux des modifications à partir duquel tenir l'index à jour.
+    """
+    # Jeton pris avant la lecture : une modification concurrente sera relue, jamais perdue
+    horizon = changes_horizon()
+    watermark = encode_watermark((horizon, None), (horizon, None))
+    rows = session.execute(select(*(Product.__table__.c[name] for name in SEARCH_COLUMNS))).all()
+    return [tuple(row) for row in rows], watermark
+
+
+def fulltext_search_available(session: Session) -> bool:
+    """
+    Indique si la table des produits a un index de recherche en texte intégral (SQL Server).
+    """
+    if session.get_bind().dialect.name != "mssql":
+        return False
+    return session.execute(
+        text("SELECT 1 FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID('SalesLT.Product')")
+    ).first() is not None
+
+
+def fulltext_search_products(session: Session, terms: List[str], limit: int, offset: int) -> Dict[str, Any]:
+    """
+    Recherche les produits avec l'index de texte intégral de SQL Server (CONTAINSTABLE),
+    chaque terme étant cherché comme préfixe.
+
+    Args:
+        session (Session): Session de base de données.
+        terms (List[str]): Termes normalisés (lettres et chiffres uniquement), tous obligatoires.
+        limit (int): Nombre de résultats de la page.
+        offset (int): Nombre de résultats à sauter.
+
+    Returns:
+        Dict[str, Any]: Résultats classés par pertinence (`items`) et nombre total (`total`).
+    """
+    condition = " AND ".join(f'"{term}*"' for term in terms)
+    rows = session.execute(
+        text(
+            "SELECT p.ProductID, p.Name, p.ProductNumber, p.Color, ft.[RANK] AS score, COUNT(*) OVER () AS total "
+            "FROM SalesLT.Product AS p "
+            "JOIN CONTAINSTABLE(SalesLT.Product, (Name, ProductNumber, Color), :condition) AS ft "
+            "ON ft.[KEY] = p.ProductID "
+            "ORDER BY ft.[RANK] DESC, p.ProductID "
+            "OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY"
+        ),
+        {"condition": condition, "offset": offset, "limit": limit},
+    ).all()
+    items = [
+        {"ProductID": row.ProductID, "Name": row.Name, "ProductNumber": row.ProductNumber,
+         "Color": row.Color, "score": float(row.score)}
+        for row in rows
+    ]
+    return {"items": items, "total": rows[0].total if rows else 0}
+
+
+# Regroupements possibles des statistiques du catalogue
+STATS_GROUPS = ("category", "model", "color")
+
+
+def get_product_stats(session: Session, group_by: str) -> Dict[str, Any]:
+    """
+    Calcule en une requête GROUP BY le nombre de produits, les prix catalogue et les marges
+    (`ListPrice - StandardCost`) minimaux, maximaux et moyens de chaque groupe.
+
+    Args:
+        session (Session): Session de base de données.
+        group_by (str): `category` (avec la catégorie parente), `model` ou `color`.
+
+    Returns:
+        Dict[str, Any]: `group_by`, `total_products`, `groups` (triés par identifiant ou
+            couleur, les produits sans valeur en premier) et `computed_at`.
+
+    Raises:
+        ValueError: Si le regroupement est inconnu.
+    """
+    margin = Product.ListPrice - Product.StandardCost
+    aggregates = [
+        func.count().label("product_count"),
+        func.min(Product.ListPrice).label("min_list_price"),
+        func.max(Product.ListPrice).label("max_list_price"),
+        func.avg(Product.ListPrice).label("avg_list_price"),
+        func.min(margin).label("min_margin"),
+        func.max(margin).label("max_margin"),
+        func.avg(margin).label("avg_margin"),
+    ]
+    if group_by == "category":
+        parent = aliased(ProductCategory)
+        keys = [
+            Product.ProductCategoryID.label("id"),
+            ProductCategory.Name.label("name"),
+            ProductCategory.ParentProductCategoryID.label("parent_id"),
+            parent.Name.label("parent_name"),
+        ]
+        statement = (
+            select(*keys, *aggregates).select_from(Product)
+            .outerjoin(ProductCategory, Product.ProductCategoryID == ProductCategory.ProductCategoryID)
+            .outerjoin(parent, ProductCategory.ParentProductCategoryID == parent.ProductCategoryID)
+        )
+    elif group_by == "model":
+        keys = [Product.ProductModelID.label("id"), ProductModel.Name.label("name")]
+        statement = (
+            select(*keys, *aggregates).select_from(Product)
+            .outerjoin(ProductModel, Product.ProductModelID == ProductModel.ProductModelID)
+        )
+    elif group_by == "color":
+        keys = [Product.Color.label("name")]
+        statement = select(*keys, *aggregates).select_from(Product)
+    else:
+        raise ValueError(f"Regroupement inconnu : {group_by} (valeurs possibles : {', '.join(STATS_GROUPS)})")
+
+    # Les colonnes des jointures sont regroupées avec la clé (une valeur par clé)
+    statement = statement.group_by(*(key.element for key in keys)).order_by(keys[0].element)
+    computed_at = datetime.utcnow()
+    groups = []
+    for row in session.execute(statement):
+        group = dict(row._mapping)
+        for name in ("min_list_price", "max_list_price", "avg_list_price", "min_margin", "max_margin", "avg_margin"):
+            # Les colonnes money de MSSQL sont lues en Decimal
+            if group[name] is not None:
+                group[name] = float(group[name])
+        groups.append(group)
+    return {
+        "group_by": group_by,
+        "total_products": sum(group["product_count"] for group in groups),
+        "groups": groups,
+        "computed_at": computed_at,
+    }
@@ -1,18 +1,220 @@
+from contextlib import asynccontextmanager
+from threading import Lock
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple, Union
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from app.config import settings
+from app.metrics import instrument_engine
 import logging
 
-# Crée l'engine de connexion à la base de données
-engine = create_engine(
-    settings.database_url,
-    echo=settings.app_name == "API CRUD avec Authentification",  
-)
+
+# Part du budget de connexions d'un worker réservée à l'engine synchrone en mode asynchrone
+# (il ne sert alors qu'aux flux NDJSON et aux scripts)
+SYNC_ENGINE_SHARE = 0.25
+
+
+def worker_connections(workers: int) -> Tuple[int, int]:
+    """
+    Répartit DB_CONNECTION_BUDGET entre les workers, puis la part de chaque worker entre ses
+    engines. Chaque engine garde au moins une connexion, prise dans la part du worker : la
+    somme ne dépasse jamais le budget.
+
+    Args:
+        workers (int): Nombre de processus workers.
+
+    Returns:
+        Tuple[int, int]: Connexions de l'engine synchrone et de l'engine asynchrone
+            (0 en mode synchrone).
+
+    Raises:
+        ValueError: Si le budget ne permet pas une connexion par engine et par worker.
+    """
+    engines = 2 if settings.db_async else 1
+    per_worker = settings.db_connection_budget // max(1, workers)
+    if per_worker < engines:
+        raise ValueError(
+            f"DB_CONNECTION_BUDGET={settings.db_connection_budget} est inférieur au minimum de "
+            f"{engines} connexion(s) par worker pour {workers} workers ({workers * engines})."
+        )
+    if engines == 1:
+        return per_worker, 0
+    sync_connections = min(per_worker - 1, max(1, int(per_worker * SYNC_ENGINE_SHARE)))
+    return sync_connections, per_worker - sync_connections
+
+
+def worker_pool_limits(async_engine: bool = False) -> Tuple[int, int]:
+    """
+    Calcule la taille du pool d'un engine du worker.
+
+    Sans DB_CONNECTION_BUDGET, chaque engine garde DB_POOL_SIZE + DB_MAX_OVERFLOW connexions.
+    Avec un budget, celui-ci est réparti entre les WEB_WORKERS processus et leurs engines
+    (voir `worker_connections`) pour que l'ensemble des workers ne dépasse pas la limite de
+    connexions du serveur.
+
+    Args:
+        async_engine (bool): True pour l'engine asynchrone, False pour l'engine synchrone.
+
+    Returns:
+        Tuple[int, int]: Taille du pool et débordement autorisé (pool_size, max_overflow).
+
+    Raises:
+        ValueError: Si le budget ne permet pas une connexion par engine et par worker.
+    """
+    if settings.db_connection_budget <= 0:
+        return settings.db_pool_size, settings.db_max_overflow
+    sync_connections, async_connections = worker_connections(settings.web_workers)
+    connections = async_connections if async_engine else sync_connections
+    pool_size = min(settings.db_pool_size, connections)
+    return pool_size, connections - pool_size
+
+
+def engine_options(database_url: str, async_engine: bool = False) -> Dict[str, Any]:
+    """
+    Construit les options de l'engine à partir de la configuration du pool.
+
+    Args:
+        database_url (str): URL de connexion de l'engine.
+        async_engine (bool): True pour l'engine asynchrone (part du budget de connexions).
+
+    Returns:
+        Dict[str, Any]: Arguments nommés pour create_engine / create_async_engine.
+    """
+    options = {
+        "echo": settings.db_echo,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+    if database_url.startswith("sqlite"):
+        # SQLite n'a pas de schéma SalesLT : les tables sont créées dans la base principale
+        options["execution_options"] = {"schema_translate_map": {"SalesLT": None}}
+    else:
+        # SQLite n'utilise pas de pool de taille fixe (fichier local ou base en mémoire)
+        pool_size, max_overflow = worker_pool_limits(async_engine)
+        options.update(
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    # Envoie les executemany (imports en masse) en un seul aller-retour avec pyodbc
+    if database_url.startswith("mssql+pyodbc"):
+        options["fast_executemany"] = True
+    return options
+
+
+# Engines créés au premier usage (ou au démarrage du worker, voir `lifespan` dans app.main)
+# plutôt qu'à l'import : le chargement des pilotes et la création du pool ne ralentissent
+# plus l'import de l'application.
+_engine: Optional[Engine] = None
+_async_engine: Optional[AsyncEngine] = None
+_engine_lock = Lock()
+
+
+def get_engine() -> Engine:
+    """
+    Renvoie l'engine synchrone, créé au premier appel.
+
+    Returns:
+        Engine: Engine synchrone (pyodbc pour MSSQL).
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(settings.database_url, **engine_options(settings.database_url))
+                # Mesure des requêtes SQL (temps en base par requête HTTP, journal des requêtes lentes)
+                if settings.metrics_enabled or settings.server_timing_enabled or settings.slow_query_threshold_ms > 0:
+                    instrument_engine(engine)
+                _engine = engine
+    return _engine
+
+
+def get_async_engine() -> Optional[AsyncEngine]:
+    """
+    Renvoie l'engine asynchrone, créé au premier appel.
+
+    Returns:
+        Optional[AsyncEngine]: Engine asynchrone (aioodbc pour MSSQL, aiosqlite en local),
+            ou None en mode synchrone (DB_ASYNC=false).
+    """
+    global _async_engine
+    if not settings.db_async:
+        return None
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                engine = create_async_engine(
+                    settings.async_database_url,
+                    **engine_options(settings.async_database_url, async_engine=True),
+                )
+                if settings.metrics_enabled or settings.server_timing_enabled or settings.slow_query_threshold_ms > 0:
+                    instrument_engine(engine.sync_engine)
+                _async_engine = engine
+    return _async_engine
+
+
+async def dispose_engines() -> None:
+    """Ferme les connexions des pools (arrêt du worker) ; les engines seront recréés au besoin."""
+    global _engine, _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+    if _engine is not None:
+        await run_in_threadpool(_engine.dispose)
+        _engine = None
+
 
 # Configure le logger pour capturer les erreurs éventuelles
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-def get_session():
+
+class ThreadedSession:
+    """
+    Session synchrone exposée avec l'interface `run_sync` d'AsyncSession.
+
+    Utilisée en mode synchrone (DB_ASYNC=false) : les requêtes sont exécutées dans le pool
+    de threads de Starlette au lieu de bloquer la boucle d'événements.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    async def run_sync(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Exécute `fn(session, *args, **kwargs)` dans un thread du pool."""
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+
+# Type des sessions fournies aux routes, quel que soit le mode choisi
+DatabaseSession = Union[AsyncSession, ThreadedSession]
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[DatabaseSession]:
+    """
+    Ouvre une session selon le mode configuré et garantit sa fermeture.
+
+    Yields:
+        DatabaseSession: AsyncSession en mode asynchrone, ThreadedSession sinon.
+    """
+    async_engine = get_async_engine()
+    if async_engine is not None:
+        # expire_on_commit=False : les objets restent lisibles après le commit sans
+        # déclencher de nouvelle requête hors du contexte asynchrone
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+    else:
+        session = Session(get_engine())
+        try:
+            yield ThreadedSession(session)
+        finally:
+            await run_in_threadpool(session.close)
+
+
+async def get_session():
     """
     Gère la création et la fermeture de la session de base de données.
 
@@ -21,7 +223,7 @@ def get_session():
     """
     try:
         # Démarrer une session
-        with Session(engine) as session:
+        async with session_scope() as session:
             yield session
     except Exception as e:
         logger.error(f"Erreur lors de la gestion de la session de base de données : {str(e)}")
@@ -29,13 +231,34 @@ def get_session():
     finally:
         pass
 
+def pool_status() -> Dict[str, int]:
+    """
+    Renvoie l'état du pool de connexions de l'engine utilisé par les routes.
+
+    Permet de distinguer un pool saturé (aucune connexion libre, débordement au maximum)
+    de requêtes SQL simplement lentes.
+
+    Returns:
+        Dict[str, int]: Taille du pool, connexions empruntées, libres et en débordement.
+    """
+    async_engine = get_async_engine()
+    pool = async_engine.sync_engine.pool if async_engine is not None else get_engine().pool
+    # Les pools sans taille fixe (SQLite) n'exposent pas ces compteurs
+    return {
+        "pool_size": pool.size() if hasattr(pool, "size") else 0,
+        "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else 0,
+        "idle": pool.checkedin() if hasattr(pool, "checkedin") else 0,
+        "overflow": max(pool.overflow(), 0) if hasattr(pool, "overflow") else 0,
+    }
+
+
 # Vérification de la connexion à la base de données
-def check_database_connection():
+async def check_database_connection():
     """Vérifie la connexion à la base de données"""
     try:
-        with Session(engine) as session:
+        async with session_scope() as session:
             # Effectuer une simple requête pour tester la connexion
-            session.execute("SELECT 1")
+            await session.run_sync(lambda sync_session: sync_session.execute(text("SELECT 1")))
             logger.info("Connexion à la base de données réussie.")
     except Exception as e:
         logger.error(f"Erreur de connexion à la base de données : {str(e)}")
@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any, Optional
+import hashlib
+from fastapi import Response, status
+from app.config import settings
+
+
+def compute_etag(*parts: Any) -> str:
+    """
+    Calcule un ETag fort à partir des éléments qui identifient une version d'une ressource.
+
+    Returns:
+        str: ETag entre guillemets, prêt à être envoyé dans l'en-tête.
+    """
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def product_etag(payload: dict) -> str:
+    """
+    ETag d'un produit sérialisé, dérivé de son rowguid et de sa date de modification
+    (et de celles des relations incluses avec `expand`).
+    """
+    parts = [payload["rowguid"], payload["ModifiedDate"]]
+    for relation in ("Category", "Model"):
+        if relation in payload:
+            related = payload[relation]
+            parts.append(f"{relation}:{related['ModifiedDate'] if related else None}")
+    return compute_etag(*parts)
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """
+    Indique si un en-tête If-None-Match / If-Match correspond à l'ETag courant.
+
+    Accepte `*` et les listes d'ETags séparés par des virgules ; le préfixe faible `W/`
+    est ignoré.
+    """
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return any(candidate == "*" or candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def set_cache_headers(response: Response, etag: str, last_modified: Optional[datetime] = None) -> None:
+    """Ajoute ETag, Cache-Control et Last-Modified à une réponse."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = settings.product_cache_control
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    """Construit une réponse 304 sans corps, avec les en-têtes de cache."""
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_cache_headers(response, etag, last_modified)
+    return response
+
+
+def http_date(value: datetime) -> str:
+    """Formate une date au format HTTP (les dates sans fuseau sont considérées en UTC)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
@@ -1,11 +1,52 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session, select
+from pydantic import ValidationError
+from contextlib import asynccontextmanager
 from datetime import timedelta
-from typing import List
-from app.auth.auth import create_access_token, authenticate_user, get_current_user
-from app.database import get_session
-from app.models import Product, ProductCreate
+from typing import Any, AsyncIterator, Dict, FrozenSet, List, Literal, Optional, Tuple
+import json
+import logging
+import time
+from app.auth.auth import WRITE_SCOPE, create_access_token, authenticate_user, get_current_user
+from app.auth.hashing import password_verifier
+from app.config import settings
+from app import crud
+from app.cache import product_cache, stats_cache
+from app.responses import DefaultResponse, fast_json_enabled, json_response
+from app.http_cache import compute_etag, etag_matches, not_modified, product_etag, set_cache_headers
+from app.database import (
+    DatabaseSession, check_database_connection, dispose_engines, get_async_engine, get_engine, get_session, pool_status,
+    session_scope,
+)
+from app.compression import CompressionMiddleware
+from app.metrics import MetricsMiddleware, render_metrics
+from app.search import SearchUnavailable, product_search
+from app.singleflight import SingleFlightTimeout, invalidate_product_reads, listing_flight, product_flight
+from app.write_batcher import write_batcher
+from app.models import (
+    BulkResult, BulkRowResult, Product, ProductBatch, ProductBatchGet, ProductChanges, ProductCreate, ProductFilters,
+    ProductPage, ProductRead, ProductSearchPage, ProductStats,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Crée les engines au démarrage du worker (et non à l'import de l'application), puis
+    libère les connexions et les threads bcrypt à l'arrêt.
+    """
+    get_engine()
+    get_async_engine()
+    await product_search.start()
+    yield
+    await product_search.stop()
+    # Les écritures en attente d'un lot sont envoyées avant la fermeture des connexions
+    await write_batcher.drain()
+    await dispose_engines()
+    password_verifier.shutdown()
 
 # Initialisation de l'application FastAPI
 app = FastAPI(
@@ -21,23 +62,48 @@ app = FastAPI(
         - Supprimer un produit.
     """,
     version="1.0.0",
+    default_response_class=DefaultResponse,
+    lifespan=lifespan,
 )
 
-# Durée d'expiration des tokens
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+@app.exception_handler(SingleFlightTimeout)
+async def single_flight_timeout_handler(request: Request, exc: SingleFlightTimeout):
+    """Lecture partagée trop longue : la base est saturée, le client peut réessayer."""
+    logger.warning(str(exc))
+    return json_response(
+        {"detail": "Service momentanément surchargé, réessayez"},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"},
+    )
+
+# Compression des réponses (gzip, brotli, zstd), y compris des flux NDJSON
+if settings.compression_enabled:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_minimum_size)
+
+# Durée par route, temps en base et nombre de requêtes SQL de chaque requête HTTP
+# (exposés sur /metrics ou dans l'en-tête Server-Timing)
+if settings.metrics_enabled or settings.server_timing_enabled:
+    app.add_middleware(MetricsMiddleware, server_timing=settings.server_timing_enabled)
 
 @app.post("/token", response_model=dict, tags=["Authentification"])
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """
     Authentifie l'utilisateur et retourne un token d'accès.
+
+    Le rôle et les scopes du compte sont inscrits dans le token. Si des scopes sont demandés
+    (champ `scope` du formulaire), seuls ceux accordés au compte sont retenus.
     """
     try:
-        authenticate_user(form_data.username, form_data.password)
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        user = await authenticate_user(form_data.username, form_data.password)
+        scopes = user["scopes"]
+        if form_data.scopes:
+            scopes = [scope for scope in scopes if scope in form_data.scopes]
+        access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
         access_token = create_access_token(
-            data={"sub": form_data.username}, expires_delta=access_token_expires
+            data={"sub": user["username"], "role": user["role"], "scope": " ".join(scopes), "ver": user["ver"]},
+            expires_delta=access_token_expires,
         )
-        return {"access_token": access_token, "token_type": "bearer"}
+        return {"access_token": access_token, "token_type": "bearer", "scope": " ".join(scopes)}
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -53,41 +119,372 @@ async def protected_route(current_user: dict = Depends(get_current_user)):
     """
     return {"message": f"Welcome, {current_user['username']}!"}
 
-@app.get("/products/", response_model=List[Product], tags=["Produits"])
+if settings.health_endpoints_enabled:
+    @app.get("/health/db", response_model=dict, tags=["Santé"])
+    async def database_health():
+        """
+        Vérifie la connexion à la base de données et renvoie l'état du pool de connexions.
+        - **Token requis** : Non (route activée par HEALTH_ENDPOINTS_ENABLED).
+        """
+        try:
+            await check_database_connection()
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+        return {"status": "ok", "pool": pool_status()}
+
+    @app.get("/health/cache", response_model=dict, tags=["Santé"])
+    async def cache_health():
+        """
+        Renvoie les compteurs des caches des produits et des statistiques (succès, échecs, taille).
+        - **Token requis** : Non (route activée par HEALTH_ENDPOINTS_ENABLED).
+        """
+        return {"products": product_cache.stats(), "stats": stats_cache.stats()}
+
+if settings.metrics_enabled:
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    async def metrics():
+        """
+        Expose les mesures au format texte Prometheus (durées par route, temps en base,
+        requêtes SQL par requête, état du pool de connexions et du cache des produits).
+        - **Token requis** : Non (route activée par METRICS_ENABLED).
+        """
+        pool = pool_status()
+        cache = product_cache.stats()
+        gauges = {
+            "db_pool_size": ("Taille du pool de connexions.", pool["pool_size"]),
+            "db_pool_checked_out": ("Connexions empruntées.", pool["checked_out"]),
+            "db_pool_idle": ("Connexions libres.", pool["idle"]),
+            "db_pool_overflow": ("Connexions en débordement.", pool["overflow"]),
+            "product_cache_hits": ("Lectures servies par le cache des produits.", cache["hits"]),
+            "product_cache_misses": ("Lectures absentes du cache des produits.", cache["misses"]),
+        }
+        return PlainTextResponse(render_metrics(gauges), media_type="text/plain; version=0.0.4")
+
+def parse_expand(expand: Optional[str] = Query(None, description="Relations à inclure : category, model")) -> FrozenSet[str]:
+    """
+    Dépendance qui lit le paramètre `expand` (liste séparée par des virgules).
+
+    Raises:
+        HTTPException: Si une relation inconnue est demandée.
+    """
+    if not expand:
+        return frozenset()
+    names = frozenset(name.strip() for name in expand.split(",") if name.strip())
+    unknown = names - crud.EXPANDABLE_RELATIONS.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Relations inconnues dans expand : {', '.join(sorted(unknown))}",
+        )
+    return names
+
+def parse_filters(
+    category_id: Optional[int] = Query(None, description="Filtre sur ProductCategoryID"),
+    min_price: Optional[float] = Query(None, ge=0, description="Prix (ListPrice) minimal"),
+    max_price: Optional[float] = Query(None, ge=0, description="Prix (ListPrice) maximal"),
+    color: Optional[str] = Query(None, description="Couleur exacte"),
+    active: Optional[bool] = Query(None, description="true : produits encore en vente (SellEndDate vide)"),
+    name_prefix: Optional[str] = Query(None, description="Début du nom du produit"),
+) -> ProductFilters:
+    """Dépendance qui regroupe les filtres de la liste des produits."""
+    return ProductFilters(
+        category_id=category_id,
+        min_price=min_price,
+        max_price=max_price,
+        color=color,
+        active=active,
+        name_prefix=name_prefix,
+    )
+
+def parse_fields(
+    fields: Optional[str] = Query(None, description="Colonnes à renvoyer, séparées par des virgules"),
+    view: Literal["full", "summary"] = Query("full", description="summary : vue allégée ProductSummary"),
+) -> List[str]:
+    """
+    Dépendance qui lit la projection `fields`, ou la vue allégée `view=summary`.
+
+    Raises:
+        HTTPException: Si une colonne inconnue est demandée.
+    """
+    if view == "summary":
+        if fields:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="fields et view ne peuvent pas être combinés")
+        return list(crud.SUMMARY_COLUMNS)
+    if not fields:
+        return []
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = set(names) - crud.PRODUCT_COLUMNS
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Colonnes inconnues dans fields : {', '.join(sorted(unknown))}",
+        )
+    return names
+
+@app.get("/products/", response_model=ProductPage, response_model_exclude_unset=True, tags=["Produits"])
 async def list_products(
-    session: Session = Depends(get_session),
+    request: Request,
+    response: Response,
+    after: Optional[int] = Query(None, description="Dernier ProductID de la page précédente (curseur)"),
+    limit: int = Query(settings.page_size_default, ge=1, le=settings.page_size_max),
+    stream: Optional[Literal["ndjson"]] = Query(None, description="Diffuse tous les produits au format NDJSON"),
+    sort: str = Query("ProductID", description="Colonne de tri, préfixée par - pour un tri décroissant"),
+    expand: FrozenSet[str] = Depends(parse_expand),
+    filters: ProductFilters = Depends(parse_filters),
+    fields: List[str] = Depends(parse_fields),
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user),
 ):
     """
-    Liste tous les produits disponibles.
+    Liste les produits disponibles, page par page.
+    - **after** : curseur renvoyé dans `next_cursor` par la page précédente.
+    - **limit** : nombre de produits par page.
+    - **stream** : `ndjson` pour recevoir tous les produits en flux, un par ligne.
+    - **sort** : `ProductID`, `Name`, `ProductNumber`, `ListPrice`, `StandardCost`, `SellStartDate`
+      ou `ModifiedDate`, préfixé par `-` pour un tri décroissant.
+    - **expand** : `category`, `model` ou `category,model` pour inclure les relations.
+    - **category_id**, **min_price**, **max_price**, **color**, **active**, **name_prefix** : filtres.
+    - **fields** : colonnes à renvoyer (projection), par exemple `Name,ListPrice`.
+    - **view** : `summary` pour la vue allégée (ProductSummary).
+    - **If-None-Match** : réponse 304 sans corps si la liste n'a pas changé.
     - **Token requis** : Oui.
     """
-    statement = select(Product)
-    results = session.exec(statement).all()
-    if not results:
+    if sort.lstrip("-") not in crud.SORTABLE_COLUMNS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Tri impossible sur {sort}")
+    if fields and expand:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="fields et expand ne peuvent pas être combinés")
+
+    if stream == "ndjson":
+        return StreamingResponse(crud.iter_products_ndjson(after, filters=filters), media_type="application/x-ndjson")
+
+    # Les requêtes identiques simultanées partagent une même lecture (session propre à la lecture)
+    filter_key = tuple(sorted(filters.model_dump(exclude_none=True).items()))
+
+    async def read_version():
+        async with session_scope() as session:
+            return await session.run_sync(crud.get_listing_version, filters)
+
+    # Sonde de version : une requête agrégée suffit pour répondre 304
+    version = await listing_flight.do(("version", filter_key), read_version)
+    etag = compute_etag("products", version["count"], version["last_modified"], version["max_id"], request.url.query)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, version["last_modified"])
+
+    # Mode rapide : lignes SQL lues sans objets ORM et encodées sans revalidation
+    if fast_json_enabled() and not expand and not fields:
+        fields = crud.ALL_COLUMNS
+
+    async def read_page():
+        async with session_scope() as session:
+            return await session.run_sync(
+                crud.get_products_page, after, limit, expand=expand, filters=filters, sort=sort, fields=fields
+            )
+
+    page = await listing_flight.do(("page", after, limit, expand, filter_key, sort, tuple(fields)), read_page)
+    if not page["items"] and after is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Aucun produit trouvé")
-    return results
+    if fields:
+        # Les produits partiels ne correspondent pas au modèle de réponse complet
+        response = json_response(page)
+        set_cache_headers(response, etag, version["last_modified"])
+        return response
+    set_cache_headers(response, etag, version["last_modified"])
+    return page
+
+@app.get("/products/changes", response_model=ProductChanges, tags=["Produits"])
+async def list_product_changes(
+    since: Optional[str] = Query(None, description="Jeton `watermark` de la synchronisation précédente"),
+    limit: int = Query(settings.page_size_max, ge=1, le=settings.page_size_max),
+    stream: Optional[Literal["ndjson"]] = Query(None, description="Diffuse toutes les modifications au format NDJSON"),
+    session: DatabaseSession = Depends(get_session),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Renvoie les produits créés, modifiés ou supprimés depuis la synchronisation précédente.
+    - **since** : jeton `watermark` renvoyé par l'appel précédent ; absent, tout le catalogue est renvoyé.
+    - **limit** : nombre maximal de produits et de suppressions ; si `has_more` vaut true,
+      rappeler immédiatement avec le nouveau `watermark`.
+    - **stream** : `ndjson` pour recevoir toutes les modifications en flux, une par ligne ;
+      la dernière ligne contient le `watermark` suivant.
+    - **Token requis** : Oui.
+    """
+    try:
+        if stream == "ndjson":
+            return StreamingResponse(crud.iter_product_changes_ndjson(since), media_type="application/x-ndjson")
+        return await session.run_sync(crud.get_product_changes, since, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@app.get("/products/stats", response_model=ProductStats, response_model_exclude_unset=True, tags=["Produits"])
+async def product_stats(
+    response: Response,
+    group_by: Literal["category", "model", "color"] = Query("category", description="Regroupement des produits"),
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Statistiques du catalogue calculées en base : nombre de produits, prix catalogue et marges
+    (`ListPrice - StandardCost`) minimaux, maximaux et moyens par groupe.
+    - **group_by** : `category` (avec la catégorie parente), `model` ou `color`.
+    - **If-None-Match** : réponse 304 sans corps si les statistiques n'ont pas été recalculées.
+    - **Token requis** : Oui.
+    """
+    # La génération change à chaque écriture : un calcul commencé avant une écriture est
+    # mémorisé sous l'ancienne clé et ne sera plus servi
+    key = (listing_flight.generation, group_by)
+    stats = stats_cache.get(key)
+    if stats is None:
+        async def read():
+            async with session_scope() as session:
+                return await session.run_sync(crud.get_product_stats, group_by)
+
+        stats = await listing_flight.do(("stats", group_by), read)
+        stats_cache.set(key, stats)
 
-@app.get("/products/{product_id}", response_model=Product, tags=["Produits"])
+    etag = compute_etag("stats", group_by, stats["computed_at"].isoformat())
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, stats["computed_at"])
+    if fast_json_enabled():
+        response = json_response(stats)
+        set_cache_headers(response, etag, stats["computed_at"])
+        return response
+    set_cache_headers(response, etag, stats["computed_at"])
+    return stats
+
+@app.get("/products/search", response_model=ProductSearchPage, tags=["Produits"])
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=200, description="Texte cherché dans Name, ProductNumber et Color"),
+    limit: int = Query(20, ge=1, le=settings.page_size_max),
+    offset: int = Query(0, ge=0, description="Nombre de résultats à sauter (`next_offset` de la page précédente)"),
+    session: DatabaseSession = Depends(get_session),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Recherche des produits par nom, numéro ou couleur.
+    - **q** : termes cherchés, tous obligatoires ; chacun peut être le début d'un mot (`road fra`).
+    - **limit** / **offset** : pagination des résultats, classés par pertinence.
+    - **Token requis** : Oui.
+    """
+    try:
+        result = await product_search.search(session, q, limit, offset)
+    except SearchUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    if fast_json_enabled():
+        return json_response(result)
+    return result
+
+@app.post("/products/batch-get", response_model=ProductBatch, response_model_exclude_unset=True, tags=["Produits"])
+async def batch_get_products(
+    body: ProductBatchGet,
+    expand: FrozenSet[str] = Depends(parse_expand),
+    session: DatabaseSession = Depends(get_session),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Consulte plusieurs produits en un seul appel.
+    - **Body** : `{"ids": [1, 2, 3]}`, au plus BATCH_GET_MAX_IDS identifiants.
+    - **expand** : `category`, `model` ou `category,model` pour inclure les relations.
+    - Les produits sont renvoyés dans l'ordre des identifiants demandés ; un produit inexistant
+      a `found` à false et figure dans `missing`.
+    - **Token requis** : Oui.
+    """
+    if len(body.ids) > settings.batch_get_max_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Au plus {settings.batch_get_max_ids} identifiants par lecture groupée",
+        )
+
+    unique_ids = list(dict.fromkeys(body.ids))
+    found: Dict[int, Dict[str, Any]] = {}
+    # Le cache ne contient que les produits sans relations
+    if not expand:
+        for product_id in unique_ids:
+            payload = product_cache.get(product_id)
+            if payload is not None:
+                found[product_id] = payload
+
+    to_load = [product_id for product_id in unique_ids if product_id not in found]
+    if to_load:
+        # Comme GET /products/{product_id} : pas de mise en cache si une écriture a eu lieu pendant la lecture
+        generation = product_flight.generation
+        loaded = await session.run_sync(crud.get_products_by_ids, to_load, expand)
+        if not expand and product_flight.generation == generation:
+            for product_id, payload in loaded.items():
+                product_cache.set(product_id, payload)
+        found.update(loaded)
+
+    result = {
+        "items": [
+            {"ProductID": product_id, "found": product_id in found, "product": found.get(product_id)}
+            for product_id in body.ids
+        ],
+        "missing": [product_id for product_id in unique_ids if product_id not in found],
+    }
+    if fast_json_enabled() and not expand:
+        # Mode rapide : les dictionnaires sont encodés directement, sans revalidation
+        return json_response(result)
+    return result
+
+@app.get("/products/{product_id}", response_model=ProductRead, response_model_exclude_unset=True, tags=["Produits"])
 async def get_product(
     product_id: int,
-    session: Session = Depends(get_session),
+    response: Response,
+    expand: FrozenSet[str] = Depends(parse_expand),
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user),
 ):
     """
     Consulte un produit spécifique par son ID.
     - **product_id** : ID du produit.
+    - **expand** : `category`, `model` ou `category,model` pour inclure les relations.
+    - **If-None-Match** : réponse 304 sans corps si le produit n'a pas changé.
+    - Les requêtes simultanées sur le même produit partagent une seule lecture en base.
     - **Token requis** : Oui.
     """
-    product = session.get(Product, product_id)
-    if not product:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Produit non trouvé")
-    return product
+    async def read(function, *args):
+        # Session propre à la lecture partagée : elle survit à l'annulation d'une requête
+        async with session_scope() as session:
+            return await session.run_sync(function, *args)
+
+    payload = None
+    # Le cache ne contient que les produits sans relations
+    if not expand:
+        payload = product_cache.get(product_id)
+        if payload is None and if_none_match:
+            # Sonde de version : rowguid et ModifiedDate suffisent pour répondre 304
+            version = await product_flight.do(
+                ("version", product_id), lambda: read(crud.get_product_version, product_id)
+            )
+            if version and etag_matches(if_none_match, product_etag(version)):
+                return not_modified(product_etag(version), version["ModifiedDate"])
+
+    if payload is None:
+        # Une écriture terminée pendant la lecture a déjà mis à jour le cache : la version lue,
+        # peut-être plus ancienne, n'y est alors pas enregistrée
+        generation = product_flight.generation
+        payload = await product_flight.do(
+            ("product", product_id, expand), lambda: read(crud.get_product, product_id, expand)
+        )
+        if not payload:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Produit non trouvé")
+        if not expand and product_flight.generation == generation:
+            product_cache.set(product_id, payload)
+
+    etag = product_etag(payload)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, payload["ModifiedDate"])
+    if fast_json_enabled() and not expand:
+        # Mode rapide : le dictionnaire est encodé directement, sans revalidation
+        fast_response = json_response(payload)
+        set_cache_headers(fast_response, etag, payload["ModifiedDate"])
+        return fast_response
+    set_cache_headers(response, etag, payload["ModifiedDate"])
+    return payload
 
 @app.post("/products/", response_model=Product, tags=["Produits"])
 async def create_product(
     product: ProductCreate,
-    session: Session = Depends(get_session),
+    session: DatabaseSession = Depends(get_session),
     current_user: dict = Depends(get_current_user),
 ):
     """
@@ -95,61 +492,181 @@ async def create_product(
     - **Body** : Détails du produit à créer.
     - **Token requis** : Oui.
     """
-    if not current_user.get('is_admin', False):  # Vérification si l'utilisateur est admin
+    if WRITE_SCOPE not in current_user["scopes"]:  # Vérification du droit d'écriture (scope du token)
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès interdit")
     
-    new_product = Product.from_orm(product)
-    session.add(new_product)
-    session.commit()
-    session.refresh(new_product)
+    if write_batcher.enabled:
+        new_product = await write_batcher.create(product)
+    else:
+        new_product = await session.run_sync(crud.create_product, product)
+    invalidate_product_reads()
+    product_search.index_product(new_product)
+    product_cache.set(new_product.ProductID, new_product.model_dump())
     return new_product
 
+async def _iter_bulk_payload(request: Request) -> AsyncIterator[Tuple[Any, Optional[str]]]:
+    """
+    Lit le corps d'un import en masse : tableau JSON, ou NDJSON lu au fil de l'eau.
+
+    Yields:
+        Tuple[Any, Optional[str]]: Élément décodé, ou None avec le message d'erreur de décodage.
+    """
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    try:
+                        yield json.loads(line), None
+                    except ValueError as e:
+                        yield None, f"JSON invalide : {e}"
+        if buffer.strip():
+            try:
+                yield json.loads(buffer), None
+            except ValueError as e:
+                yield None, f"JSON invalide : {e}"
+        return
+
+    try:
+        items = json.loads(await request.body())
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"JSON invalide : {e}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Le corps doit être un tableau JSON")
+    for item in items:
+        yield item, None
+
+@app.post("/products/bulk", response_model=BulkResult, tags=["Produits"])
+async def bulk_upsert_products(
+    request: Request,
+    session: DatabaseSession = Depends(get_session),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Importe des produits en masse : création, ou mise à jour si le ProductNumber existe déjà.
+    - **Body** : tableau JSON de produits, ou un produit par ligne avec `Content-Type: application/x-ndjson`.
+    - Les lignes sont validées et écrites par lots de BULK_BATCH_SIZE, avec un commit par lot.
+    - **Token requis** : Oui.
+    """
+    if WRITE_SCOPE not in current_user["scopes"]:  # Vérification du droit d'écriture (scope du token)
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès interdit")
+
+    started = time.perf_counter()
+    results: List[BulkRowResult] = []
+    batch: List[Tuple[int, ProductCreate]] = []
+
+    async def flush() -> None:
+        try:
+            statuses, documents = await session.run_sync(crud.upsert_products, [product for _, product in batch])
+        except Exception as e:
+            logger.error(f"Erreur lors de l'import d'un lot de produits : {str(e)}")
+            await session.run_sync(lambda sync_session: sync_session.rollback())
+            results.extend(
+                BulkRowResult(index=index, ProductNumber=product.ProductNumber, status="error", detail=str(e))
+                for index, product in batch
+            )
+        else:
+            invalidate_product_reads()
+            for (index, product), (row_status, product_id) in zip(batch, statuses):
+                results.append(BulkRowResult(index=index, ProductNumber=product.ProductNumber, status=row_status, ProductID=product_id))
+                if product_id is not None:
+                    product_cache.delete(product_id)
+            for document in documents:
+                product_search.index_product(document)
+        batch.clear()
+
+    received = 0
+    async for item, error in _iter_bulk_payload(request):
+        index = received
+        received += 1
+        if error is None:
+            try:
+                batch.append((index, ProductCreate.model_validate(item)))
+            except (ValidationError, TypeError) as e:
+                error = str(e)
+        if error is not None:
+            product_number = item.get("ProductNumber") if isinstance(item, dict) else None
+            results.append(BulkRowResult(index=index, ProductNumber=product_number, status="error", detail=error))
+        if len(batch) >= settings.bulk_batch_size:
+            await flush()
+    if batch:
+        await flush()
+
+    results.sort(key=lambda result: result.index)
+    elapsed = time.perf_counter() - started
+    return BulkResult(
+        received=received,
+        created=sum(result.status == "created" for result in results),
+        updated=sum(result.status == "updated" for result in results),
+        errors=sum(result.status == "error" for result in results),
+        elapsed_seconds=round(elapsed, 4),
+        rows_per_second=round(received / elapsed, 1) if elapsed > 0 else 0.0,
+        results=results,
+    )
+
 @app.put("/products/{product_id}", response_model=Product, tags=["Produits"])
 async def update_product(
     product_id: int,
     product: ProductCreate,
-    session: Session = Depends(get_session),
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    session: DatabaseSession = Depends(get_session),
     current_user: dict = Depends(get_current_user),
 ):
     """
     Met à jour un produit existant.
     - **product_id** : ID du produit à modifier.
     - **Body** : Détails du produit à mettre à jour.
+    - **If-Match** : ETag de la version lue ; 412 si le produit a été modifié entre-temps.
     - **Token requis** : Oui.
     """
-    if not current_user.get('is_admin', False):  # Vérification si l'utilisateur est admin
+    if WRITE_SCOPE not in current_user["scopes"]:  # Vérification du droit d'écriture (scope du token)
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès interdit")
     
-    existing_product = session.get(Product, product_id)
-    if not existing_product:
+    try:
+        if write_batcher.enabled:
+            updated_product = await write_batcher.update(product_id, product, if_match)
+        else:
+            updated_product = await session.run_sync(crud.update_product, product_id, product, if_match)
+    except crud.PreconditionFailed:
+        product_cache.delete(product_id)
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Le produit a été modifié entre-temps")
+    if not updated_product:
+        product_cache.delete(product_id)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Produit non trouvé")
-    
-    for key, value in product.dict(exclude_unset=True).items():
-        setattr(existing_product, key, value)
-    
-    session.add(existing_product)
-    session.commit()
-    session.refresh(existing_product)
-    return existing_product
+    invalidate_product_reads()
+    payload = updated_product.model_dump()
+    product_search.index_product(payload)
+    product_cache.set(product_id, payload)
+    set_cache_headers(response, product_etag(payload), payload["ModifiedDate"])
+    return updated_product
 
 @app.delete("/products/{product_id}", response_model=dict, tags=["Produits"])
 async def delete_product(
     product_id: int,
-    session: Session = Depends(get_session),
+    if_match: Optional[str] = Header(None),
+    session: DatabaseSession = Depends(get_session),
     current_user: dict = Depends(get_current_user),
 ):
     """
     Supprime un produit existant.
     - **product_id** : ID du produit à supprimer.
+    - **If-Match** : ETag de la version lue ; 412 si le produit a été modifié entre-temps.
     - **Token requis** : Oui.
     """
-    if not current_user.get('is_admin', False):  # Vérification si l'utilisateur est admin
+    if WRITE_SCOPE not in current_user["scopes"]:  # Vérification du droit d'écriture (scope du token)
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Accès interdit")
     
-    product = session.get(Product, product_id)
-    if not product:
+    try:
+        deleted = await session.run_sync(crud.delete_product, product_id, if_match)
+    except crud.PreconditionFailed:
+        product_cache.delete(product_id)
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Le produit a été modifié entre-temps")
+    product_cache.delete(product_id)
+    if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Produit non trouvé")
-    
-    session.delete(product)
-    session.commit()
+    invalidate_product_reads()
+    product_search.remove_product(product_id)
     return {"message": f"Produit {product_id} supprimé avec succès"}
@@ -0,0 +1,304 @@
+"""
+Mesures de performance : durée des requêtes HTTP par route, temps passé en base et nombre
+de requêtes SQL par requête HTTP, journal des requêtes SQL lentes.
+
+Les mesures sont exposées au format texte Prometheus (GET /metrics) et, si
+SERVER_TIMING_ENABLED est actif, dans l'en-tête `Server-Timing` de chaque réponse.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+# Journal dédié aux requêtes SQL lentes (remplace DB_ECHO, qui journalise tout)
+slow_query_logger = logging.getLogger("app.sql.slow")
+
+# Limites des histogrammes de durée, en secondes
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Limites de l'histogramme du nombre de requêtes SQL par requête HTTP
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class RequestStats:
+    """
+    Mesures accumulées pendant le traitement d'une requête HTTP.
+
+    Attributes:
+        db_time (float): Temps total d'exécution des requêtes SQL, en secondes.
+        queries (int): Nombre de requêtes SQL exécutées.
+        timings (Dict[str, float]): Autres étapes mesurées avec `timed()` (auth...), en secondes.
+    """
+
+    __slots__ = ("db_time", "queries", "timings")
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.queries = 0
+        self.timings: Dict[str, float] = {}
+
+
+# Mesures de la requête en cours. L'objet est partagé (et non copié) avec les threads du pool
+# et les greenlets d'AsyncSession, qui héritent du contexte de la requête.
+_current_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """
+    Mesure la durée d'une étape et l'ajoute aux mesures de la requête en cours.
+
+    Args:
+        name (str): Nom de l'étape dans l'en-tête Server-Timing (ex. `auth`).
+    """
+    stats = _current_stats.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.timings[name] = stats.timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def _escape(value: str) -> str:
+    """Échappe une valeur d'étiquette Prometheus."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    labels = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """
+    Compteur Prometheus, éventuellement ventilé par étiquettes.
+
+    Args:
+        name (str): Nom de la métrique.
+        documentation (str): Description (ligne HELP).
+        label_names (Sequence[str]): Noms des étiquettes.
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = Lock()
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_number(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    Histogramme Prometheus (compteurs cumulés par limite, somme et nombre d'observations).
+
+    Args:
+        name (str): Nom de la métrique.
+        documentation (str): Description (ligne HELP).
+        buckets (Sequence[float]): Limites supérieures des intervalles, croissantes.
+        label_names (Sequence[str]): Noms des étiquettes.
+    """
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float], label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(label_names)
+        # Par jeu d'étiquettes : [compteurs par intervalle (+Inf inclus), somme, nombre]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    break
+            else:
+                index = len(self.buckets)
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else _format_number(bound)
+                    bucket_labels = _format_labels(self.label_names, labels, 'le="' + le + '"')
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                suffix = _format_labels(self.label_names, labels)
+                lines.append(f"{self.name}_sum{suffix} {_format_number(total)}")
+                lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Durée des requêtes HTTP.", DURATION_BUCKETS, ("method", "route", "status"),
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds", "Temps passé en base par requête HTTP.", DURATION_BUCKETS, ("route",),
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "Nombre de requêtes SQL par requête HTTP.", QUERY_COUNT_BUCKETS, ("route",),
+)
+QUERY_DURATION = Histogram("db_query_duration_seconds", "Durée des requêtes SQL.", DURATION_BUCKETS)
+SLOW_QUERIES = Counter("db_slow_queries_total", "Requêtes SQL plus lentes que SLOW_QUERY_THRESHOLD_MS.")
+
+SINGLEFLIGHT_REQUESTS = Counter(
+    "singleflight_requests_total",
+    "Lectures regroupées : `leader` exécute la requête SQL, `coalesced` réutilise une requête en cours.",
+    ("flight", "role"),
+)
+SINGLEFLIGHT_TIMEOUTS = Counter(
+    "singleflight_timeouts_total", "Lectures partagées abandonnées après SINGLEFLIGHT_TIMEOUT.", ("flight",),
+)
+
+METRICS = [
+    REQUEST_DURATION, REQUEST_DB_DURATION, REQUEST_DB_QUERIES, QUERY_DURATION, SLOW_QUERIES,
+    SINGLEFLIGHT_REQUESTS, SINGLEFLIGHT_TIMEOUTS,
+]
+
+
+def render_metrics(gauges: Optional[Dict[str, Tuple[str, float]]] = None) -> str:
+    """
+    Produit le texte d'exposition Prometheus de toutes les métriques.
+
+    Args:
+        gauges (Optional[Dict[str, Tuple[str, float]]]): Valeurs instantanées à ajouter
+            (nom -> (description, valeur)), ex. l'état du pool de connexions.
+
+    Returns:
+        str: Métriques au format texte Prometheus 0.0.4.
+    """
+    lines: List[str] = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    for name, (documentation, value) in (gauges or {}).items():
+        lines.extend([f"# HELP {name} {documentation}", f"# TYPE {name} gauge", f"{name} {_format_number(value)}"])
+    return "\n".join(lines) + "\n"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    QUERY_DURATION.observe(elapsed)
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.db_time += elapsed
+        stats.queries += 1
+    threshold = settings.slow_query_threshold_ms
+    if threshold > 0 and elapsed * 1000 >= threshold:
+        SLOW_QUERIES.inc()
+        # Les paramètres ne sont pas journalisés : ils peuvent contenir des données personnelles
+        slow_query_logger.warning("Requête SQL lente (%.1f ms) : %s", elapsed * 1000, " ".join(statement.split())[:1000])
+
+
+def _handle_error(exception_context) -> None:
+    # La requête a échoué : retire son heure de début pour ne pas fausser la suivante
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start_time"):
+        connection.info["query_start_time"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Branche la mesure des requêtes SQL sur un engine synchrone
+    (pour un AsyncEngine, passer `async_engine.sync_engine`).
+
+    Args:
+        engine (Engine): Engine à instrumenter.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _server_timing(stats: RequestStats, total: float) -> bytes:
+    """Construit la valeur de l'en-tête Server-Timing (durées en millisecondes)."""
+    entries = [f"total;dur={total * 1000:.1f}", f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"']
+    entries.extend(f"{name};dur={duration * 1000:.1f}" for name, duration in stats.timings.items())
+    return ", ".join(entries).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI qui mesure chaque requête HTTP : durée par route, temps passé en base
+    et nombre de requêtes SQL.
+
+    Écrit directement au niveau ASGI (plutôt qu'avec `@app.middleware("http")`) pour ne pas
+    ajouter de tâche ni de mise en mémoire du corps sur chaque requête, y compris les flux NDJSON.
+
+    Args:
+        app: Application ASGI enveloppée.
+        server_timing (bool): Ajoute l'en-tête Server-Timing aux réponses.
+    """
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", _server_timing(stats, time.perf_counter() - start)))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
+            # Gabarit de la route (ex. /products/{product_id}) : le chemin brut ferait exploser
+            # le nombre de séries
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            REQUEST_DURATION.observe(time.perf_counter() - start, (scope["method"], route_path, str(status_code)))
+            REQUEST_DB_DURATION.observe(stats.db_time, (route_path,))
+            REQUEST_DB_QUERIES.observe(stats.queries, (route_path,))
@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, List
 from datetime import datetime
@@ -17,12 +18,12 @@ class ProductBase(SQLModel):
     Weight: Optional[float] = None
     ProductCategoryID: Optional[int] = None
     ProductModelID: Optional[int] = None
-    SellStartDate: datetime = Field(default_factory=datetime)
+    SellStartDate: datetime = Field(default_factory=datetime.utcnow)
     SellEndDate: Optional[datetime] = None
     DiscontinuedDate: Optional[datetime] = None
     ThumbnailPhotoFileName: Optional[str] = None
     rowguid: uuid.UUID = Field(default_factory=uuid.uuid4)
-    ModifiedDate: datetime = Field(default_factory=datetime)
+    ModifiedDate: datetime = Field(default_factory=datetime.utcnow)
 
 # Modèle pour la catégorie des produits
 class ProductCategory(SQLModel, table=True):
@@ -36,7 +37,7 @@ class ProductCategory(SQLModel, table=True):
     Name: str = Field(..., max_length=255)
     ParentProductCategoryID: Optional[int] = None
     rowguid: uuid.UUID = Field(default_factory=uuid.uuid4)
-    ModifiedDate: datetime = Field(default_factory=datetime)
+    ModifiedDate: datetime = Field(default_factory=datetime.utcnow)
 
     Products: List["Product"] = Relationship(back_populates="Category", sa_relationship_kwargs={"lazy": "select"})
 
@@ -52,7 +53,7 @@ class ProductModel(SQLModel, table=True):
     Name: str = Field(..., max_length=255)
     CatalogDescription: Optional[str] = None
     rowguid: uuid.UUID = Field(default_factory=uuid.uuid4)
-    ModifiedDate: datetime = Field(default_factory=datetime)
+    ModifiedDate: datetime = Field(default_factory=datetime.utcnow)
 
     Products: List["Product"] = Relationship(back_populates="Model", sa_relationship_kwargs={"lazy": "select"})
 
@@ -62,19 +63,254 @@ class Product(ProductBase, table=True):
     Modèle représentant un produit dans la base de données.
     """
     __tablename__ = "Product"
-    __table_args__ = {"schema": "SalesLT"}
+    __table_args__ = (
+        # Index des colonnes filtrées par GET /products/ (recherche par seek plutôt que par scan)
+        Index("IX_Product_ProductCategoryID", "ProductCategoryID"),
+        Index("IX_Product_ListPrice", "ListPrice"),
+        Index("IX_Product_Color", "Color"),
+        Index("IX_Product_SellEndDate", "SellEndDate"),
+        Index("IX_Product_Name", "Name"),
+        # Flux des modifications (GET /products/changes) : parcours par (ModifiedDate, ProductID)
+        Index("IX_Product_ModifiedDate", "ModifiedDate", "ProductID"),
+        {"schema": "SalesLT"},
+    )
 
-    ProductID: int = Field(primary_key=True)
+    ProductID: Optional[int] = Field(default=None, primary_key=True)
     ProductCategoryID: Optional[int] = Field(default=None, foreign_key="SalesLT.ProductCategory.ProductCategoryID")
     ProductModelID: Optional[int] = Field(default=None, foreign_key="SalesLT.ProductModel.ProductModelID")
 
     Category: Optional[ProductCategory] = Relationship(back_populates="Products")
     Model: Optional[ProductModel] = Relationship(back_populates="Products")
 
+# Trace des produits supprimés
+class ProductTombstone(SQLModel, table=True):
+    """
+    Trace d'un produit supprimé, enregistrée dans la même transaction que la suppression,
+    pour que le flux des modifications puisse signaler les suppressions.
+    """
+    __tablename__ = "ProductTombstone"
+    __table_args__ = (
+        Index("IX_ProductTombstone_DeletedDate", "DeletedDate", "TombstoneID"),
+        {"schema": "SalesLT"},
+    )
+
+    TombstoneID: Optional[int] = Field(default=None, primary_key=True)
+    ProductID: int
+    ProductNumber: str = Field(..., max_length=50)
+    DeletedDate: datetime = Field(default_factory=datetime.utcnow)
+
+# Modèle des utilisateurs de l'API
+class User(SQLModel, table=True):
+    """
+    Compte utilisateur ou compte de service de l'API.
+
+    Le rôle et les scopes sont copiés dans le token à la connexion : les routes ne relisent
+    pas cette table à chaque requête. Incrémenter `TokenVersion` (ou désactiver le compte)
+    révoque les tokens déjà émis si TOKEN_REVOCATION_CHECK est actif.
+    """
+    __tablename__ = "ApiUser"
+    __table_args__ = (
+        Index("UX_ApiUser_Username", "Username", unique=True),
+        {"schema": "SalesLT"},
+    )
+
+    UserID: Optional[int] = Field(default=None, primary_key=True)
+    Username: str = Field(..., max_length=150)
+    HashedPassword: str = Field(..., max_length=255)
+    Role: str = Field(default="reader", max_length=50)
+    Scopes: str = Field(default="", max_length=500)  # Scopes supplémentaires, séparés par des espaces
+    IsActive: bool = True
+    TokenVersion: int = 0
+    ModifiedDate: datetime = Field(default_factory=datetime.utcnow)
+
+# Modèles de lecture des relations d'un produit (paramètre `expand`)
+class ProductCategoryRead(SQLModel):
+    """
+    Catégorie imbriquée dans un produit lorsque `expand` contient `category`.
+    """
+    ProductCategoryID: int
+    Name: str
+    ParentProductCategoryID: Optional[int] = None
+
+class ProductModelRead(SQLModel):
+    """
+    Modèle imbriqué dans un produit lorsque `expand` contient `model`.
+    """
+    ProductModelID: int
+    Name: str
+
+# Modèle de lecture d'un produit
+class ProductRead(ProductBase):
+    """
+    Produit renvoyé par les routes de lecture. `Category` et `Model` ne sont présents
+    dans la réponse que s'ils ont été demandés avec `expand`.
+    """
+    ProductID: int
+    Category: Optional[ProductCategoryRead] = None
+    Model: Optional[ProductModelRead] = None
+
+# Vue allégée d'un produit
+class ProductSummary(SQLModel):
+    """
+    Vue allégée et en lecture seule d'un produit (`view=summary`), sans les colonnes
+    volumineuses ou techniques (miniature, rowguid, dates de fin de vie).
+    """
+    ProductID: int
+    Name: str
+    ProductNumber: str
+    Color: Optional[str] = None
+    ListPrice: Optional[float] = None
+    ProductCategoryID: Optional[int] = None
+    ProductModelID: Optional[int] = None
+    ModifiedDate: datetime
+
+# Filtres de la liste des produits
+class ProductFilters(SQLModel):
+    """
+    Filtres appliqués dans la clause WHERE de la liste des produits.
+    """
+    category_id: Optional[int] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    color: Optional[str] = None
+    active: Optional[bool] = None  # True : SellEndDate IS NULL, False : SellEndDate IS NOT NULL
+    name_prefix: Optional[str] = None
+
+# Modèle de réponse pour la liste paginée des produits
+class ProductPage(SQLModel):
+    """
+    Page de produits renvoyée par la pagination par curseur sur ProductID.
+    `next_cursor` vaut None lorsqu'il n'y a plus de page suivante.
+    """
+    items: List[ProductRead]
+    next_cursor: Optional[int] = None
+
+# Modification d'un produit dans le flux des modifications
+class ProductChange(SQLModel):
+    """
+    Modification renvoyée par GET /products/changes : `upsert` (produit créé ou modifié,
+    état courant dans `product`) ou `delete` (produit supprimé le `DeletedDate`).
+    """
+    op: str
+    ProductID: int
+    product: Optional[ProductRead] = None
+    ProductNumber: Optional[str] = None
+    DeletedDate: Optional[datetime] = None
+
+# Page du flux des modifications
+class ProductChanges(SQLModel):
+    """
+    Modifications postérieures au jeton `since`. `watermark` est le jeton à fournir lors de la
+    synchronisation suivante ; `has_more` indique qu'il reste des modifications à lire immédiatement.
+    """
+    changes: List[ProductChange]
+    watermark: str
+    has_more: bool
+
+# Résultat de la recherche de produits
+class ProductSearchHit(SQLModel):
+    """
+    Produit trouvé par GET /products/search, avec son score de pertinence.
+    """
+    ProductID: int
+    Name: str
+    ProductNumber: str
+    Color: Optional[str] = None
+    score: float
+
+# Page de résultats de la recherche
+class ProductSearchPage(SQLModel):
+    """
+    Résultats classés par pertinence. `next_offset` vaut None lorsqu'il n'y a plus de page suivante.
+    """
+    items: List[ProductSearchHit]
+    total: int
+    next_offset: Optional[int] = None
+
+# Statistiques d'un groupe de produits
+class ProductStatsGroup(SQLModel):
+    """
+    Agrégats d'un groupe de GET /products/stats. `id` et `name` identifient la catégorie, le
+    modèle ou la couleur (null pour les produits sans valeur) ; `parent_id` et `parent_name`
+    désignent la catégorie parente (regroupement par catégorie uniquement).
+    La marge est `ListPrice - StandardCost`.
+    """
+    id: Optional[int] = None
+    name: Optional[str] = None
+    parent_id: Optional[int] = None
+    parent_name: Optional[str] = None
+    product_count: int
+    min_list_price: Optional[float] = None
+    max_list_price: Optional[float] = None
+    avg_list_price: Optional[float] = None
+    min_margin: Optional[float] = None
+    max_margin: Optional[float] = None
+    avg_margin: Optional[float] = None
+
+# Statistiques du catalogue
+class ProductStats(SQLModel):
+    """
+    Statistiques calculées en base, par catégorie, modèle ou couleur. `computed_at` est la date
+    du calcul : les résultats sont mémorisés jusqu'à la prochaine écriture de produit.
+    """
+    group_by: str
+    total_products: int
+    groups: List[ProductStatsGroup]
+    computed_at: datetime
+
+# Corps de la lecture groupée de produits
+class ProductBatchGet(SQLModel):
+    """
+    Identifiants des produits à lire avec POST /products/batch-get.
+    """
+    ids: List[int]
+
+# Résultat de la lecture groupée pour un identifiant
+class ProductBatchItem(SQLModel):
+    """
+    Produit demandé dans une lecture groupée : `found` vaut false (et `product` null) s'il n'existe pas.
+    """
+    ProductID: int
+    found: bool
+    product: Optional[ProductRead] = None
+
+# Réponse de la lecture groupée
+class ProductBatch(SQLModel):
+    """
+    Produits dans l'ordre des identifiants demandés (doublons inclus), et identifiants introuvables.
+    """
+    items: List[ProductBatchItem]
+    missing: List[int]
+
 # Modèle pour la création et la mise à jour des produits
 class ProductCreate(ProductBase):
     """
     Modèle utilisé pour la création de nouveaux produits ou la mise à jour de produits existants.
     """
-    SellStartDate: datetime = Field(default_factory=datetime)
-    ModifiedDate: datetime = Field(default_factory=datetime)
+    SellStartDate: datetime = Field(default_factory=datetime.utcnow)
+    ModifiedDate: datetime = Field(default_factory=datetime.utcnow)
+
+# Résultat d'une ligne de l'import en masse
+class BulkRowResult(SQLModel):
+    """
+    Résultat de l'import d'une ligne : `created`, `updated`, `duplicate` (remplacée par une
+    ligne suivante du même lot ayant le même ProductNumber) ou `error`.
+    """
+    index: int
+    ProductNumber: Optional[str] = None
+    status: str
+    ProductID: Optional[int] = None
+    detail: Optional[str] = None
+
+# Réponse de l'import en masse
+class BulkResult(SQLModel):
+    """
+    Bilan de l'import en masse, avec le débit mesuré en lignes par seconde.
+    """
+    received: int
+    created: int
+    updated: int
+    errors: int
+    elapsed_seconds: float
+    rows_per_second: float
+    results: List[BulkRowResult]
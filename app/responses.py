@@ -0,0 +1,42 @@
+from typing import Any, Dict, Optional
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.responses import Response
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel : repli sur l'encodeur JSON de la bibliothèque standard
+    orjson = None
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    Réponse JSON encodée avec orjson.
+
+    orjson sérialise directement les datetime, UUID et dictionnaires issus des lignes SQL,
+    sans passer par jsonable_encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def fast_json_enabled() -> bool:
+    """Indique si le mode de sérialisation rapide est actif (FAST_JSON et orjson installé)."""
+    return settings.fast_json and orjson is not None
+
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Construit une réponse JSON sans revalidation par un modèle de réponse.
+
+    Utilise orjson en mode rapide, sinon jsonable_encoder et l'encodeur standard.
+    """
+    if fast_json_enabled():
+        return ORJSONResponse(content, status_code=status_code, headers=headers)
+    return JSONResponse(jsonable_encoder(content), status_code=status_code, headers=headers)
+
+
+# Classe de réponse par défaut de l'application
+DefaultResponse = ORJSONResponse if fast_json_enabled() else JSONResponse
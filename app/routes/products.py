@@ -1,30 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
-from app.database import get_session
-from app.models import Product, ProductCreate
-from app.auth.auth import get_current_user
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from app import crud
+from app.cache import product_cache
+from app.config import settings
+from app.database import DatabaseSession, get_session
+from app.models import Product, ProductCreate, ProductPage
+from app.auth.auth import WRITE_SCOPE, get_current_user
+from typing import Literal, Optional
 
 router = APIRouter()
 
 # Récupére la liste des produits
-@router.get("/", response_model=List[Product], summary="Lister les produits")
+@router.get("/", response_model=ProductPage, response_model_exclude_unset=True, summary="Lister les produits")
 async def list_products(
-    session: Session = Depends(get_session), 
+    after: Optional[int] = Query(None),
+    limit: int = Query(settings.page_size_default, ge=1, le=settings.page_size_max),
+    stream: Optional[Literal["ndjson"]] = Query(None),
+    session: DatabaseSession = Depends(get_session), 
     user=Depends(get_current_user)
 ):
+    if stream == "ndjson":
+        return StreamingResponse(crud.iter_products_ndjson(after), media_type="application/x-ndjson")
+
     try:
-        # Récupére tous les produits depuis la base de données
-        statement = select(Product)
-        products = session.exec(statement).all()
+        # Récupére une page de produits depuis la base de données
+        page = await session.run_sync(crud.get_products_page, after, limit)
 
         # Vérification si des produits ont été trouvés
-        if not products:
+        if not page["items"] and after is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Aucun produit trouvé"
             )
-        return products
+        return page
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -35,23 +43,20 @@ async def list_products(
 @router.post("/", response_model=Product, summary="Créer un produit")
 async def create_product(
     product: ProductCreate, 
-    session: Session = Depends(get_session), 
+    session: DatabaseSession = Depends(get_session), 
     user=Depends(get_current_user)
 ):
     try:
         # Vérife si l'utilisateur a les droits nécessaires
-        if not user or not user.get('is_admin', False):
+        if not user or WRITE_SCOPE not in user.get('scopes', ()):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Vous n'avez pas les droits pour créer un produit"
             )
 
         # Création d'un nouveau produit dans la base de données
-        new_product = Product.from_orm(product)
-        session.add(new_product)
-        session.commit()
-        session.refresh(new_product)
-
+        new_product = await session.run_sync(crud.create_product, product)
+        product_cache.set(new_product.ProductID, new_product.model_dump())
         return new_product
     except Exception as e:
         raise HTTPException(
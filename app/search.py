@@ -0,0 +1,398 @@
+"""
+Recherche de produits par nom, numéro et couleur (GET /products/search).
+
+Deux moteurs :
+    memory    index inversé en mémoire, construit au démarrage du worker puis tenu à jour par
+              les routes d'écriture et, pour les écritures des autres workers, par le flux des
+              modifications (GET /products/changes) relu toutes les SEARCH_REFRESH_SECONDS
+    fulltext  index de texte intégral de SQL Server (CONTAINSTABLE), si la table en a un
+
+SEARCH_BACKEND=auto choisit fulltext lorsqu'il est disponible, memory sinon.
+"""
+from bisect import bisect_left
+from operator import neg
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import heapq
+import logging
+import re
+import unicodedata
+
+from app import crud
+from app.cache import InMemoryCache
+from app.config import settings
+from app.database import DatabaseSession, session_scope
+
+logger = logging.getLogger(__name__)
+
+# Poids d'un terme selon la colonne où il apparaît
+FIELD_WEIGHTS = (("ProductNumber", 3.0), ("Name", 2.0), ("Color", 1.0))
+# Un terme identique au terme cherché compte plus qu'un terme qui le prolonge
+EXACT_BONUS = 2.0
+# En dessous de cette longueur, un terme cherché n'est pas étendu aux termes qui le prolongent
+MIN_PREFIX_LENGTH = 2
+# Un terme est vérifié sur chaque candidat plutôt que cherché dans l'index lorsque ses
+# listes de produits sont plus de VERIFY_RATIO fois plus longues que la liste des candidats
+VERIFY_RATIO = 20
+# Jusqu'à ce nombre de termes qui le prolongent, un terme est cherché directement dans leurs
+# listes pour chaque candidat (une recherche de dictionnaire par terme et par candidat)
+PROBE_TERMS = 8
+
+_TOKEN = re.compile(r"[0-9a-z]+")
+# Caractère suivant "z" : borne supérieure des termes commençant par un préfixe
+_AFTER_LAST = "{"
+
+
+class SearchUnavailable(Exception):
+    """L'index de recherche n'est pas encore construit."""
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    """
+    Découpe un texte en termes : minuscules, sans accents, lettres et chiffres uniquement.
+
+    Args:
+        value (Optional[str]): Texte à découper (ex. `Vélo Route-58`).
+
+    Returns:
+        List[str]: Termes dans l'ordre du texte (ex. `["velo", "route", "58"]`).
+    """
+    if not value:
+        return []
+    normalized = unicodedata.normalize("NFKD", value.casefold())
+    return _TOKEN.findall(normalized.encode("ascii", "ignore").decode("ascii"))
+
+
+def document_terms(name: Optional[str], number: Optional[str], color: Optional[str]) -> Dict[str, float]:
+    """Termes d'un produit avec leur poids (celui de la colonne la plus importante)."""
+    fields = {"Name": name, "ProductNumber": number, "Color": color}
+    terms: Dict[str, float] = {}
+    for field, weight in FIELD_WEIGHTS:
+        for term in tokenize(fields[field]):
+            if weight > terms.get(term, 0.0):
+                terms[term] = weight
+    return terms
+
+
+class SearchIndex:
+    """
+    Index inversé en mémoire : terme -> {ProductID: poids}, avec la liste triée des termes
+    pour la recherche par préfixe (bisect).
+
+    Modifié uniquement depuis la boucle d'événements (routes, tâche de rafraîchissement).
+    Les dernières recherches sont mémorisées jusqu'à la modification suivante de l'index.
+
+    Args:
+        cache_size (int): Nombre de résultats de recherche mémorisés.
+    """
+
+    def __init__(self, cache_size: int = 1024):
+        self.ready = False
+        # Incrémentée à chaque modification : les résultats mémorisés plus anciens sont ignorés
+        self._generation = 0
+        self._results = InMemoryCache(max_size=cache_size)
+        # ProductID -> (Name, ProductNumber, Color, {terme: poids})
+        self._documents: Dict[int, Tuple[Optional[str], Optional[str], Optional[str], Dict[str, float]]] = {}
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._terms: List[str] = []
+
+    def load(self, rows: Iterable[Tuple[int, Optional[str], Optional[str], Optional[str]]]) -> None:
+        """
+        Remplace le contenu de l'index.
+
+        Args:
+            rows (Iterable[Tuple[int, Optional[str], Optional[str], Optional[str]]]): Lignes
+                (ProductID, Name, ProductNumber, Color).
+        """
+        documents, postings = {}, {}
+        for product_id, name, number, color in rows:
+            terms = document_terms(name, number, color)
+            documents[product_id] = (name, number, color, terms)
+            for term, weight in terms.items():
+                postings.setdefault(term, {})[product_id] = weight
+        self._documents, self._postings, self._terms = documents, postings, sorted(postings)
+        self._generation += 1
+        self.ready = True
+
+    def add(self, product_id: int, name: Optional[str], number: Optional[str], color: Optional[str]) -> None:
+        """Ajoute ou remplace un produit."""
+        self.remove(product_id)
+        self._generation += 1
+        terms = document_terms(name, number, color)
+        self._documents[product_id] = (name, number, color, terms)
+        for term, weight in terms.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = {}
+                self._terms.insert(bisect_left(self._terms, term), term)
+            posting[product_id] = weight
+
+    def remove(self, product_id: int) -> None:
+        """Retire un produit s'il est indexé."""
+        document = self._documents.pop(product_id, None)
+        if document is None:
+            return
+        self._generation += 1
+        for term in document[3]:
+            posting = self._postings[term]
+            posting.pop(product_id, None)
+            if not posting:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+
+    def search(self, query: str, limit: int, offset: int = 0) -> Dict[str, Any]:
+        """
+        Cherche les produits contenant tous les termes de la requête, chacun comme terme exact
+        ou comme préfixe d'un terme du produit.
+
+        Args:
+            query (str): Texte cherché (ex. `road fra`).
+            limit (int): Nombre de résultats de la page.
+            offset (int): Nombre de résultats à sauter.
+
+        Returns:
+            Dict[str, Any]: Résultats classés par score décroissant puis ProductID (`items`) et
+                nombre total de produits correspondants (`total`).
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return {"items": [], "total": 0}
+        key = (self._generation, tuple(tokens), limit, offset)
+        result = self._results.get(key)
+        if result is None:
+            result = self._search(tokens, limit, offset)
+            self._results.set(key, result)
+        # Copie : l'appelant complète le dictionnaire
+        return dict(result)
+
+    def _search(self, tokens: List[str], limit: int, offset: int) -> Dict[str, Any]:
+        # Le terme le plus sélectif est cherché en premier ; chaque terme suivant est cherché
+        # dans l'index ou, si ses listes sont bien plus longues, vérifié sur chaque candidat
+        selective, best = tokens[0], None
+        for token in tokens:
+            estimate = self._estimate(token, best)
+            if best is None or estimate < best:
+                selective, best = token, estimate
+        scores = self._match(selective)
+        for token in tokens:
+            if token == selective or not scores:
+                continue
+            start, end = self._prefix_range(token)
+            if end - start <= PROBE_TERMS:
+                scores = self._probe(token, self._terms[start:end], scores)
+                continue
+            bound = VERIFY_RATIO * len(scores)
+            if self._estimate(token, bound) < bound:
+                matches = self._match(token)
+                scores = {product_id: score + matches[product_id] for product_id, score in scores.items()
+                          if product_id in matches}
+            else:
+                documents = self._documents
+                filtered = {}
+                for product_id, score in scores.items():
+                    token_score = _term_score(token, documents[product_id][3])
+                    if token_score:
+                        filtered[product_id] = score + token_score
+                scores = filtered
+        if not scores:
+            return {"items": [], "total": 0}
+
+        # (-score, ProductID) : score décroissant, puis ProductID croissant
+        ranked = heapq.nsmallest(offset + limit, zip(map(neg, scores.values()), scores.keys()))[offset:]
+        items = []
+        for negative_score, product_id in ranked:
+            name, number, color, _ = self._documents[product_id]
+            items.append({"ProductID": product_id, "Name": name, "ProductNumber": number, "Color": color,
+                          "score": -negative_score})
+        return {"items": items, "total": len(scores)}
+
+    def _prefix_range(self, token: str) -> Tuple[int, int]:
+        """Bornes, dans la liste triée des termes, du terme et des termes qui le prolongent."""
+        start = bisect_left(self._terms, token)
+        if len(token) < MIN_PREFIX_LENGTH:
+            return start, start + (token in self._postings)
+        return start, bisect_left(self._terms, token + _AFTER_LAST, start)
+
+    def _probe(self, token: str, terms: List[str], scores: Dict[int, float]) -> Dict[int, float]:
+        """Garde les candidats présents dans les listes de `terms` et leur ajoute le meilleur score."""
+        postings = [(self._postings[term], EXACT_BONUS if term == token else 1.0) for term in terms]
+        filtered = {}
+        for product_id, score in scores.items():
+            best = 0.0
+            for posting, bonus in postings:
+                weight = posting.get(product_id)
+                if weight is not None and weight * bonus > best:
+                    best = weight * bonus
+            if best:
+                filtered[product_id] = score + best
+        return filtered
+
+    def _estimate(self, token: str, bound: Optional[int]) -> int:
+        """Nombre de produits (avec répétitions) contenant le terme ou un de ses prolongements, borné à `bound`."""
+        if len(token) < MIN_PREFIX_LENGTH:
+            return len(self._postings.get(token, ()))
+        terms, postings = self._terms, self._postings
+        end = bisect_left(terms, token + _AFTER_LAST)
+        total = 0
+        for index in range(bisect_left(terms, token), end):
+            total += len(postings[terms[index]])
+            if bound is not None and total >= bound:
+                break
+        return total
+
+    def _match(self, token: str) -> Dict[int, float]:
+        """Produits contenant le terme, ou un terme qui le prolonge, avec leur meilleur score."""
+        start, end = self._prefix_range(token)
+        postings = self._postings
+        exact = postings.get(token, {})
+        matches = {product_id: weight * EXACT_BONUS for product_id, weight in exact.items()}
+        get = matches.get
+        for term in self._terms[start + bool(exact):end]:
+            for product_id, weight in postings[term].items():
+                if weight > get(product_id, 0.0):
+                    matches[product_id] = weight
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+
+def _term_score(token: str, terms: Dict[str, float]) -> float:
+    """Score d'un terme cherché pour un produit : exact, préfixe d'un de ses termes, ou 0."""
+    weight = terms.get(token)
+    if weight is not None:
+        return weight * EXACT_BONUS
+    best = 0.0
+    if len(token) >= MIN_PREFIX_LENGTH:
+        for term, weight in terms.items():
+            if weight > best and term.startswith(token):
+                best = weight
+    return best
+
+
+class ProductSearch:
+    """
+    Moteur de recherche des produits : choix du moteur au démarrage, construction et
+    rafraîchissement de l'index en mémoire.
+
+    Args:
+        backend (str): `auto`, `memory` ou `fulltext`.
+        refresh_seconds (float): Intervalle de relecture du flux des modifications (0 = jamais).
+    """
+
+    def __init__(self, backend: str = "auto", refresh_seconds: float = 5.0):
+        self.backend = backend
+        self.refresh_seconds = refresh_seconds
+        self.index = SearchIndex()
+        self._watermark: Optional[str] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def start(self) -> None:
+        """Choisit le moteur puis construit l'index en mémoire (démarrage du worker)."""
+        if self.backend == "auto":
+            try:
+                async with session_scope() as session:
+                    available = await session.run_sync(crud.fulltext_search_available)
+            except Exception as e:
+                logger.warning(f"Détection de la recherche en texte intégral impossible : {str(e)}")
+                available = False
+            self.backend = "fulltext" if available else "memory"
+        if self.backend != "memory":
+            return
+        try:
+            await self.build()
+        except Exception as e:
+            # Base indisponible au démarrage : la tâche de rafraîchissement réessaiera
+            logger.error(f"Erreur lors de la construction de l'index de recherche : {str(e)}")
+        if self.refresh_seconds > 0:
+            self._task = asyncio.ensure_future(self._refresh_loop())
+
+    async def stop(self) -> None:
+        """Arrête la tâche de rafraîchissement."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def build(self) -> None:
+        """Construit l'index à partir de tous les produits."""
+        async with session_scope() as session:
+            rows, watermark = await session.run_sync(crud.get_search_documents)
+        self.index.load(rows)
+        self._watermark = watermark
+        logger.info(f"Index de recherche construit : {len(self.index)} produits")
+
+    async def refresh(self) -> None:
+        """Applique à l'index les modifications lues dans le flux depuis le dernier rafraîchissement."""
+        if not self.index.ready:
+            await self.build()
+            return
+        async with session_scope() as session:
+            while True:
+                page = await session.run_sync(crud.get_product_changes, self._watermark, settings.page_size_max)
+                # Suppressions d'abord : les produits renvoyés existent toujours en base, même si
+                # leur identifiant a appartenu à un produit supprimé
+                for change in page["changes"]:
+                    if change["op"] == "delete":
+                        self.index.remove(change["ProductID"])
+                for change in page["changes"]:
+                    if change["op"] == "upsert":
+                        self.index_product(change["product"])
+                self._watermark = page["watermark"]
+                if not page["has_more"]:
+                    break
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Erreur lors du rafraîchissement de l'index de recherche : {str(e)}")
+
+    def index_product(self, product: Any) -> None:
+        """
+        Indexe un produit créé ou modifié (objet Product ou dictionnaire).
+        """
+        if self.backend != "memory":
+            return
+        values = product if isinstance(product, dict) else product.model_dump()
+        self.index.add(values["ProductID"], values["Name"], values["ProductNumber"], values.get("Color"))
+
+    def remove_product(self, product_id: int) -> None:
+        """Retire un produit supprimé de l'index."""
+        if self.backend == "memory":
+            self.index.remove(product_id)
+
+    async def search(self, session: DatabaseSession, query: str, limit: int, offset: int = 0) -> Dict[str, Any]:
+        """
+        Recherche les produits avec le moteur actif.
+
+        Args:
+            session (DatabaseSession): Session utilisée par le moteur fulltext.
+            query (str): Texte cherché.
+            limit (int): Nombre de résultats de la page.
+            offset (int): Nombre de résultats à sauter.
+
+        Returns:
+            Dict[str, Any]: `items`, `total` et `next_offset` (None s'il n'y a plus de résultats).
+
+        Raises:
+            SearchUnavailable: Si l'index en mémoire n'est pas encore construit.
+        """
+        if self.backend == "fulltext":
+            terms = tokenize(query)
+            result = (await session.run_sync(crud.fulltext_search_products, terms, limit, offset)
+                      if terms else {"items": [], "total": 0})
+        else:
+            if not self.index.ready:
+                raise SearchUnavailable("Index de recherche en cours de construction")
+            result = self.index.search(query, limit, offset)
+        result["next_offset"] = offset + limit if offset + limit < result["total"] else None
+        return result
+
+
+product_search = ProductSearch(settings.search_backend, settings.search_refresh_seconds)
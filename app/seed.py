@@ -0,0 +1,122 @@
+"""
+Générateur de données de test : crée les tables puis insère N produits, catégories et modèles.
+
+Les données sont déterministes (graine fixe) pour que deux exécutions des benchmarks
+travaillent sur le même jeu de données. Prévu pour une base locale (DB_URL=sqlite:///...),
+jamais pour la base de production.
+
+Usage :
+    DB_URL=sqlite:///local.db python -m app.seed --products 10000 [--categories 40] [--models 120] [--seed 42]
+"""
+import argparse
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict
+
+from sqlalchemy import delete, insert
+from sqlmodel import Session, SQLModel
+
+from app.config import settings
+from app.database import get_engine
+from app.models import Product, ProductCategory, ProductModel
+
+COLORS = ["Black", "Red", "Silver", "Blue", "Yellow", "White", "Multi", None]
+SIZES = ["S", "M", "L", "XL", "48", "52", "58", None]
+NAMES = ["Road", "Mountain", "Touring", "Sport", "Classic", "Racing", "Urban", "Trail"]
+PARTS = ["Frame", "Wheel", "Helmet", "Jersey", "Gloves", "Pedal", "Saddle", "Bike"]
+
+
+def seed_database(products: int = 1000, categories: int = 40, models: int = 120,
+                  seed: int = 42, batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Crée les tables si besoin, les vide, puis insère un jeu de données déterministe.
+
+    Args:
+        products (int): Nombre de produits à créer.
+        categories (int): Nombre de catégories (le premier quart sert de catégories parentes).
+        models (int): Nombre de modèles de produits.
+        seed (int): Graine du générateur aléatoire.
+        batch_size (int): Nombre de produits insérés par requête.
+
+    Returns:
+        Dict[str, int]: Nombre de lignes créées par table.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    engine = get_engine()
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        # Repart d'une base vide pour que le jeu de données soit reproductible
+        for model in (Product, ProductModel, ProductCategory):
+            session.execute(delete(model))
+
+        parents = max(1, categories // 4)
+        session.execute(insert(ProductCategory), [
+            {
+                "ProductCategoryID": category_id,
+                "Name": f"Category {category_id}",
+                "ParentProductCategoryID": None if category_id <= parents else rng.randint(1, parents),
+                "rowguid": uuid.UUID(int=rng.getrandbits(128)),
+                "ModifiedDate": now,
+            }
+            for category_id in range(1, categories + 1)
+        ])
+        session.execute(insert(ProductModel), [
+            {
+                "ProductModelID": model_id,
+                "Name": f"Model {model_id}",
+                "rowguid": uuid.UUID(int=rng.getrandbits(128)),
+                "ModifiedDate": now,
+            }
+            for model_id in range(1, models + 1)
+        ])
+
+        for start in range(1, products + 1, batch_size):
+            rows = []
+            for product_id in range(start, min(start + batch_size, products + 1)):
+                cost = round(rng.uniform(1, 1500), 2)
+                sell_start = now - timedelta(days=rng.randint(30, 3000))
+                rows.append({
+                    "ProductID": product_id,
+                    "Name": f"{rng.choice(NAMES)} {rng.choice(PARTS)} {product_id}",
+                    "ProductNumber": f"BN-{product_id:07d}",
+                    "Color": rng.choice(COLORS),
+                    "StandardCost": cost,
+                    "ListPrice": round(cost * rng.uniform(1.2, 2.5), 2),
+                    "Size": rng.choice(SIZES),
+                    "Weight": round(rng.uniform(100, 15000), 2),
+                    "ProductCategoryID": rng.randint(parents + 1, categories) if categories > parents else 1,
+                    "ProductModelID": rng.randint(1, models),
+                    "SellStartDate": sell_start,
+                    # Environ un produit sur dix n'est plus vendu
+                    "SellEndDate": sell_start + timedelta(days=365) if rng.random() < 0.1 else None,
+                    "rowguid": uuid.UUID(int=rng.getrandbits(128)),
+                    "ModifiedDate": now,
+                })
+            session.execute(insert(Product), rows)
+        session.commit()
+
+    return {"categories": categories, "models": models, "products": products}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Remplit la base avec des données de test.")
+    parser.add_argument("--products", type=int, default=1000, help="Nombre de produits")
+    parser.add_argument("--categories", type=int, default=40, help="Nombre de catégories")
+    parser.add_argument("--models", type=int, default=120, help="Nombre de modèles")
+    parser.add_argument("--seed", type=int, default=42, help="Graine du générateur aléatoire")
+    parser.add_argument("--force", action="store_true", help="Autorise une base autre que SQLite")
+    args = parser.parse_args()
+
+    # Les tables sont vidées : refuse par défaut de toucher à une vraie base
+    if not settings.database_url.startswith("sqlite") and not args.force:
+        parser.error("la base configurée n'est pas SQLite (DB_URL) ; utilisez --force pour la remplacer")
+
+    counts = seed_database(args.products, args.categories, args.models, args.seed)
+    print(", ".join(f"{count} {table}" for table, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
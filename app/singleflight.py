@@ -0,0 +1,111 @@
+"""
+Regroupement des lectures identiques simultanées (« single-flight »).
+
+Quand plusieurs requêtes demandent la même lecture au même moment (ex. des centaines de
+GET /products/{id} à la mise en ligne d'un produit), une seule requête SQL est exécutée et
+son résultat est distribué à toutes les requêtes en attente.
+
+Le regroupement est propre à chaque processus worker, comme le cache des produits.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from app.config import settings
+from app.metrics import SINGLEFLIGHT_REQUESTS, SINGLEFLIGHT_TIMEOUTS
+
+T = TypeVar("T")
+
+
+class SingleFlightTimeout(Exception):
+    """La lecture partagée n'a pas abouti dans le délai SINGLEFLIGHT_TIMEOUT."""
+
+
+class SingleFlight:
+    """
+    Partage une lecture en cours entre toutes les requêtes qui demandent la même clé.
+
+    La lecture est exécutée dans une tâche indépendante : l'annulation de la requête qui l'a
+    lancée (client déconnecté, délai dépassé) n'interrompt pas les autres. Elle doit donc
+    ouvrir sa propre session (`session_scope()`) plutôt qu'utiliser celle d'une requête.
+
+    Args:
+        name (str): Nom du regroupement dans les métriques (ex. `product`).
+        timeout (float): Attente maximale du résultat, en secondes (0 = sans limite).
+        enabled (bool): Si False, chaque appel exécute sa propre lecture.
+    """
+
+    def __init__(self, name: str, timeout: float = 5.0, enabled: bool = True):
+        self.name = name
+        self.timeout = timeout
+        self.enabled = enabled
+        self._inflight: Dict[Tuple[int, Hashable], "asyncio.Future[Any]"] = {}
+        # Incrémentée à chaque écriture : une lecture lancée avant l'écriture n'est plus partagée
+        self._generation = 0
+
+    async def do(self, key: Hashable, fetch: Callable[[], Awaitable[T]]) -> T:
+        """
+        Renvoie le résultat de la lecture en cours pour cette clé, ou la lance.
+
+        Args:
+            key (Hashable): Identifie la lecture (route et paramètres).
+            fetch (Callable[[], Awaitable[T]]): Exécute la lecture.
+
+        Returns:
+            T: Résultat de la lecture, partagé entre les requêtes : ne pas le modifier.
+
+        Raises:
+            SingleFlightTimeout: Le résultat n'est pas arrivé dans le délai imparti.
+        """
+        if not self.enabled:
+            return await fetch()
+
+        flight_key = (self._generation, key)
+        task = self._inflight.get(flight_key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[flight_key] = task
+            task.add_done_callback(lambda done: self._finish(flight_key, done))
+            SINGLEFLIGHT_REQUESTS.inc((self.name, "leader"))
+        else:
+            SINGLEFLIGHT_REQUESTS.inc((self.name, "coalesced"))
+
+        try:
+            # shield : une requête qui abandonne n'annule pas la lecture des autres
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout or None)
+        except asyncio.TimeoutError:
+            SINGLEFLIGHT_TIMEOUTS.inc((self.name,))
+            raise SingleFlightTimeout(f"Lecture {self.name} trop longue (plus de {self.timeout} s)")
+
+    def invalidate(self) -> None:
+        """
+        À appeler après une écriture : les lectures suivantes ne rejoignent plus celles lancées
+        avant, qui pourraient renvoyer l'ancienne version.
+        """
+        self._generation += 1
+
+    @property
+    def generation(self) -> int:
+        """Génération courante, incrémentée à chaque écriture : peut servir de clé de cache."""
+        return self._generation
+
+    def _finish(self, flight_key: Tuple[int, Hashable], task: "asyncio.Future[Any]") -> None:
+        if self._inflight.get(flight_key) is task:
+            del self._inflight[flight_key]
+        # Marque l'exception comme lue si toutes les requêtes ont abandonné avant la fin
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+# Lecture d'un produit (GET /products/{product_id}) et de sa version
+product_flight = SingleFlight("product", settings.singleflight_timeout, settings.singleflight_enabled)
+# Pages et sondes de version de la liste (GET /products/)
+listing_flight = SingleFlight("listing", settings.singleflight_timeout, settings.singleflight_enabled)
+
+
+def invalidate_product_reads() -> None:
+    """Appelée après chaque écriture de produit."""
+    product_flight.invalidate()
+    listing_flight.invalidate()
@@ -0,0 +1,106 @@
+"""
+Regroupement des écritures simultanées (WRITE_BATCH_ENABLED).
+
+Les créations et mises à jour de produits qui arrivent pendant quelques millisecondes sont
+appliquées ensemble, dans une seule transaction (un commit au lieu d'un par requête) avec des
+requêtes groupées. Chaque requête reçoit son propre résultat ou sa propre erreur.
+
+Le regroupement est propre à chaque processus worker.
+"""
+import asyncio
+from typing import Any, List, Optional, Set, Tuple
+
+from app import crud
+from app.config import settings
+from app.database import session_scope
+from app.models import Product, ProductCreate
+
+
+class WriteBatcher:
+    """
+    Collecte les écritures pendant `window` secondes, ou jusqu'à `max_items` écritures, puis
+    les applique avec `crud.apply_product_writes`.
+
+    Args:
+        window (float): Délai d'attente maximal d'une écriture avant l'envoi du lot, en secondes.
+        max_items (int): Nombre d'écritures qui déclenche l'envoi immédiat du lot.
+        enabled (bool): Si False, les routes écrivent directement avec leur session.
+    """
+
+    def __init__(self, window: float = 0.005, max_items: int = 100, enabled: bool = False):
+        self.window = window
+        self.max_items = max_items
+        self.enabled = enabled
+        self._pending: List[Tuple[crud.ProductWrite, "asyncio.Future[Any]"]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    async def create(self, product: ProductCreate) -> Product:
+        """
+        Crée un produit dans le prochain lot.
+
+        Returns:
+            Product: Produit créé.
+        """
+        return await self._submit(crud.ProductWrite(product))
+
+    async def update(self, product_id: int, product: ProductCreate, if_match: Optional[str] = None) -> Optional[Product]:
+        """
+        Met à jour un produit dans le prochain lot.
+
+        Returns:
+            Optional[Product]: Produit mis à jour, ou None s'il n'existe pas.
+
+        Raises:
+            crud.PreconditionFailed: Si le produit a été modifié depuis la version indiquée par If-Match.
+        """
+        return await self._submit(crud.ProductWrite(product, product_id, if_match))
+
+    async def drain(self) -> None:
+        """Envoie le lot en attente et attend la fin de tous les lots (arrêt du worker)."""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _submit(self, write: crud.ProductWrite) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((write, future))
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._apply(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _apply(self, batch: List[Tuple[crud.ProductWrite, "asyncio.Future[Any]"]]) -> None:
+        try:
+            async with session_scope() as session:
+                results = await session.run_sync(crud.apply_product_writes, [write for write, _ in batch])
+        except Exception as e:
+            # Connexion impossible, par exemple : toutes les écritures du lot échouent
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            # La requête a pu être annulée (client déconnecté) : l'écriture est tout de même faite
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+write_batcher = WriteBatcher(
+    window=settings.write_batch_window_ms / 1000,
+    max_items=settings.write_batch_max_items,
+    enabled=settings.write_batch_enabled,
+)
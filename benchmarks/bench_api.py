@@ -0,0 +1,96 @@
+"""
+Benchmarks des routes principales de l'API (pytest-benchmark).
+
+Usage :
+    pip install -r benchmarks/requirements.txt
+    python -m pytest benchmarks                       # enregistre les résultats dans .benchmarks/
+    python -m pytest benchmarks --benchmark-compare   # compare avec la dernière exécution enregistrée
+"""
+import itertools
+import random
+
+import pytest
+
+import environment
+from app.cache import stats_cache
+
+rng = random.Random(42)
+numbers = itertools.count(1)
+
+
+def bench_token(benchmark, client):
+    form = {"username": environment.USERNAME, "password": environment.PASSWORD}
+    response = benchmark(client.post, "/token", data=form)
+    assert response.status_code == 200
+
+
+def bench_list_products(benchmark, client, products):
+    response = benchmark(lambda: client.get("/products/", params={"after": rng.randint(0, products), "limit": 100}))
+    assert response.status_code == 200
+
+
+def bench_get_product(benchmark, client, products):
+    response = benchmark(lambda: client.get(f"/products/{rng.randint(1, products)}"))
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("group_by", ["category", "model", "color"])
+def bench_product_stats(benchmark, client, group_by):
+    # Calcul en base à chaque appel : le cache est vidé comme après une écriture
+    def stats():
+        stats_cache.clear()
+        return client.get("/products/stats", params={"group_by": group_by})
+
+    response = benchmark(stats)
+    assert response.status_code == 200
+
+
+def bench_product_stats_cached(benchmark, client):
+    response = benchmark(client.get, "/products/stats", params={"group_by": "category"})
+    assert response.status_code == 200
+
+
+def bench_search_products(benchmark, client):
+    response = benchmark(lambda: client.get("/products/search", params={"q": rng.choice(["road fr", "helmet red", "BN-00012"])}))
+    assert response.status_code == 200
+
+
+def bench_batch_get_products(benchmark, client, products):
+    response = benchmark(lambda: client.post(
+        "/products/batch-get", json={"ids": rng.sample(range(1, products + 1), min(100, products))},
+    ))
+    assert response.status_code == 200
+
+
+def bench_create_product(benchmark, client):
+    def create():
+        number = next(numbers)
+        return client.post("/products/", json={"Name": f"Bench {number}", "ProductNumber": f"BC-{number}"})
+
+    response = benchmark(create)
+    assert response.status_code == 200
+
+
+def bench_update_product(benchmark, client, products):
+    def update():
+        product_id = rng.randint(1, products)
+        return client.put(f"/products/{product_id}", json={
+            "Name": f"Updated {product_id}", "ProductNumber": f"BN-{product_id:07d}", "ListPrice": 20.0,
+        })
+
+    response = benchmark(update)
+    assert response.status_code == 200
+
+
+def bench_delete_product(benchmark, client):
+    # Chaque itération supprime un produit créé juste avant (création hors mesure)
+    def setup():
+        number = next(numbers)
+        created = client.post("/products/", json={"Name": f"Bench {number}", "ProductNumber": f"BD-{number}"})
+        return (created.json()["ProductID"],), {}
+
+    def delete(product_id):
+        return client.delete(f"/products/{product_id}")
+
+    response = benchmark.pedantic(delete, setup=setup, rounds=200)
+    assert response.status_code == 200
@@ -0,0 +1,72 @@
+"""
+Garde-fou du temps d'import de l'application (démarrage à froid des workers).
+
+Mesure `import app.main` avec `python -X importtime` dans un processus neuf et échoue si
+le temps cumulé dépasse IMPORT_TIME_BUDGET_MS. Vérifie aussi que l'import ne crée ni engine
+ni contexte bcrypt : ils doivent l'être au démarrage du worker ou au premier usage.
+
+Le temps mesuré et les modules les plus lents sont enregistrés dans `extra_info` (résultats
+sauvegardés dans .benchmarks/).
+
+Usage :
+    python -m pytest benchmarks/bench_import_time.py
+    IMPORT_TIME_BUDGET_MS=800 python -m pytest benchmarks/bench_import_time.py
+"""
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+import environment
+
+BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", "1500"))
+RUNS = 3
+
+CHECK_LAZY = (
+    "import sys, app.main, app.database as database; "
+    "assert database._engine is None and database._async_engine is None, 'engine créé à l import'; "
+    "assert 'passlib' not in sys.modules, 'passlib importé à l import'"
+)
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def profile_import(module: str = "app.main") -> Tuple[float, List[Tuple[str, float]]]:
+    """
+    Importe un module dans un interpréteur neuf avec `-X importtime`.
+
+    Args:
+        module (str): Module à importer.
+
+    Returns:
+        Tuple[float, List[Tuple[str, float]]]: Temps cumulé de l'import (ms) et temps propre
+            de chaque module importé (ms), du plus lent au plus rapide.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=environment.ROOT, env=os.environ.copy(), capture_output=True, text=True, check=True,
+    )
+    total = 0.0
+    self_times: Dict[str, float] = {}
+    for match in LINE.finditer(result.stderr):
+        self_us, cumulative_us, indent, name = match.groups()
+        self_times[name] = self_times.get(name, 0.0) + int(self_us) / 1000
+        if name == module and not indent:
+            total = int(cumulative_us) / 1000
+    return total, sorted(self_times.items(), key=lambda item: item[1], reverse=True)
+
+
+def bench_import_time(benchmark):
+    # Meilleur de plusieurs essais : le premier peut inclure la compilation des .pyc
+    runs = benchmark.pedantic(lambda: [profile_import() for _ in range(RUNS)], rounds=1, iterations=1)
+    total, modules = min(runs, key=lambda run: run[0])
+
+    benchmark.extra_info["import_ms"] = round(total, 1)
+    benchmark.extra_info["budget_ms"] = BUDGET_MS
+    benchmark.extra_info["slowest_modules_ms"] = {name: round(self_ms, 1) for name, self_ms in modules[:15]}
+    assert total <= BUDGET_MS, f"import app.main : {total:.0f} ms, budget {BUDGET_MS:.0f} ms"
+
+
+def bench_import_is_lazy():
+    subprocess.run([sys.executable, "-c", CHECK_LAZY], cwd=environment.ROOT, env=os.environ.copy(), check=True)
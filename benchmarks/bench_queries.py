@@ -0,0 +1,38 @@
+"""
+Garde-fou du nombre de requêtes SQL par requête HTTP.
+
+`expand=category,model` charge les relations par jointure : le nombre de requêtes d'une page
+de la liste ne doit pas dépendre du nombre de produits (pas de N+1).
+
+Le nombre est lu dans l'en-tête Server-Timing (`db;...;desc="N queries"`), qui ne compte que les
+requêtes de la requête HTTP, et non celles des tâches de fond (rafraîchissement de la recherche).
+
+Usage :
+    python -m pytest benchmarks/bench_queries.py
+"""
+import re
+
+import pytest
+
+LIMITS = (5, 200)
+
+QUERIES = re.compile(r'db;dur=[0-9.]+;desc="(\d+) queries"')
+
+
+def list_queries(client, limit: int, expand: str = "") -> int:
+    """Nombre de requêtes SQL d'une page de GET /products/."""
+    params = {"limit": limit, **({"expand": expand} if expand else {})}
+    response = client.get("/products/", params=params)
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == limit
+    match = QUERIES.search(response.headers.get("server-timing", ""))
+    assert match, "en-tête Server-Timing absent (SERVER_TIMING_ENABLED)"
+    return int(match.group(1))
+
+
+@pytest.mark.parametrize("expand", ["category", "model", "category,model"])
+def bench_expand_query_count(client, products, expand):
+    assert products >= max(LIMITS)
+    counts = {limit: list_queries(client, limit, expand) for limit in LIMITS}
+    # Sonde de version et page (relations incluses par jointure)
+    assert counts[LIMITS[0]] == counts[LIMITS[1]] == list_queries(client, LIMITS[0]) == 2, counts
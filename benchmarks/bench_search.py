@@ -0,0 +1,116 @@
+"""
+Benchmarks de l'index de recherche en mémoire (GET /products/search), sans base de données.
+
+L'index est construit sur un catalogue généré comme par app.seed (SEARCH_BENCH_PRODUCTS
+produits, 100 000 par défaut). Les résultats mémorisés sont désactivés : chaque recherche
+parcourt l'index. `bench_selective_lookup_budget` échoue si une recherche sélective (numéro de
+produit, plusieurs termes) dépasse SEARCH_LOOKUP_BUDGET_MS en médiane ; les médianes sont
+enregistrées dans `extra_info` (résultats sauvegardés dans .benchmarks/).
+
+`bench_bulk_import_searchable` vérifie, avec l'API, qu'un produit importé par POST /products/bulk
+est trouvé immédiatement, sans attendre le rafraîchissement périodique de l'index.
+
+Usage :
+    python -m pytest benchmarks/bench_search.py
+"""
+import os
+import random
+import statistics
+import time
+from typing import List, Tuple
+
+import pytest
+
+import environment  # noqa: F401  (configuration de l'application)
+from app.search import SearchIndex
+from app.seed import COLORS, NAMES, PARTS
+
+PRODUCTS = int(os.environ.get("SEARCH_BENCH_PRODUCTS", "100000"))
+BUDGET_MS = float(os.environ.get("SEARCH_LOOKUP_BUDGET_MS", "1"))
+
+# Recherches sélectives : quelques résultats au plus
+SELECTIVE = ["BN-0004242", "road frame 4242", "424", "mountain helm 4242"]
+# Recherches larges : une part importante du catalogue correspond, ou un terme court
+# prolongé par des milliers de termes (« 99 » : 99, 990, 9901...)
+BROAD = ["road", "red", "road frame", "mountain helm 99"]
+
+
+@pytest.fixture(scope="module")
+def rows() -> List[Tuple[int, str, str, str]]:
+    rng = random.Random(42)
+    return [
+        (product_id, f"{rng.choice(NAMES)} {rng.choice(PARTS)} {product_id}", f"BN-{product_id:07d}", rng.choice(COLORS))
+        for product_id in range(1, PRODUCTS + 1)
+    ]
+
+
+@pytest.fixture(scope="module")
+def index(rows) -> SearchIndex:
+    search_index = SearchIndex(cache_size=0)
+    search_index.load(rows)
+    return search_index
+
+
+def bench_index_build(benchmark, rows):
+    # Chargement complet, comme au démarrage d'un worker
+    search_index = SearchIndex(cache_size=0)
+    benchmark.pedantic(search_index.load, args=(rows,), rounds=1, iterations=1)
+    benchmark.extra_info["products"] = PRODUCTS
+    assert search_index.search(rows[0][2], 1)["total"] == 1
+
+
+@pytest.mark.parametrize("query", SELECTIVE + BROAD)
+def bench_search_index(benchmark, index, query):
+    result = benchmark(index.search, query, 20)
+    assert result["total"] >= 0
+
+
+def bench_index_update(benchmark, index):
+    # Mise à jour d'un produit existant (route PUT) : retrait puis ajout de ses termes
+    rng = random.Random(7)
+
+    def update():
+        product_id = rng.randint(1, PRODUCTS)
+        index.add(product_id, f"{rng.choice(NAMES)} {rng.choice(PARTS)} {product_id}", f"BN-{product_id:07d}", "Red")
+
+    benchmark(update)
+
+
+def median_lookup_ms(index: SearchIndex, query: str, runs: int = 200) -> float:
+    """Durée médiane d'une recherche, en millisecondes."""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        index.search(query, 20)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def bench_selective_lookup_budget(benchmark, index):
+    medians = benchmark.pedantic(
+        lambda: {query: median_lookup_ms(index, query) for query in SELECTIVE}, rounds=1, iterations=1
+    )
+    benchmark.extra_info["budget_ms"] = BUDGET_MS
+    benchmark.extra_info["median_ms"] = {query: round(median, 3) for query, median in medians.items()}
+    for query, median in medians.items():
+        assert median <= BUDGET_MS, f"{query!r} : {median:.3f} ms, budget {BUDGET_MS} ms"
+
+
+def bench_bulk_import_searchable(client):
+    rows = [
+        {"Name": "Quokka Bell", "ProductNumber": "QK-BULK-1", "Color": "Teal"},
+        {"Name": "Quokka Horn", "ProductNumber": "QK-BULK-2"},
+    ]
+    response = client.post("/products/bulk", json=rows)
+    assert response.status_code == 200
+    assert response.json()["created"] == 2
+    found = client.get("/products/search", params={"q": "QK-BULK-1"}).json()
+    assert [item["ProductNumber"] for item in found["items"]] == ["QK-BULK-1"]
+
+    # Mise à jour par import : l'ancien nom n'est plus trouvé, la couleur non fournie est conservée
+    rows[0]["Name"] = "Wombat Bell"
+    del rows[0]["Color"]
+    assert client.post("/products/bulk", json=rows[:1]).json()["updated"] == 1
+    assert client.get("/products/search", params={"q": "quokka bell"}).json()["total"] == 0
+    found = client.get("/products/search", params={"q": "wombat teal"}).json()
+    assert [item["ProductNumber"] for item in found["items"]] == ["QK-BULK-1"]
@@ -0,0 +1,136 @@
+"""
+Taille sur le réseau et coût CPU de la compression des réponses, par encodage et par niveau.
+
+Les corps sont produits par l'API elle-même (ASGI, sans compression) sur un catalogue généré
+par app.seed : une page de la liste (`GET /products/?limit=...`) et le flux NDJSON complet
+(`stream=ndjson`), compressé paquet par paquet comme le fait CompressionMiddleware.
+
+Usage :
+    python benchmarks/compression.py [--products 5000] [--limit 1000] [--repeat 5]
+                                     [--encoding gzip --encoding br] [--output benchmarks/results]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import environment  # noqa: E402
+
+environment.configure()
+
+import httpx  # noqa: E402
+
+from app.auth.auth import get_current_user  # noqa: E402
+from app.compression import COMPRESSORS, available_encodings  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.main import app  # noqa: E402
+
+# Niveaux mesurés par encodage (les valeurs par défaut de la configuration sont marquées *)
+LEVELS = {"gzip": [1, 3, 5, 6, 9], "br": [0, 2, 4, 5, 7, 9, 11], "zstd": [1, 3, 5, 9, 15, 19]}
+
+
+async def fetch_payloads(limit: int) -> Dict[str, List[bytes]]:
+    """
+    Récupère les corps non compressés d'une page de la liste et du flux NDJSON.
+
+    Args:
+        limit (int): Taille de la page de la liste.
+
+    Returns:
+        Dict[str, List[bytes]]: Paquets du corps, par nom de réponse (un seul pour la page).
+    """
+    app.dependency_overrides[get_current_user] = environment.admin_override
+    headers = {"Accept-Encoding": "identity"}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            page = await client.get("/products/", params={"limit": limit}, headers=headers)
+            page.raise_for_status()
+            async with client.stream("GET", "/products/", params={"stream": "ndjson"}, headers=headers) as response:
+                lines = [line.encode() + b"\n" async for line in response.aiter_lines() if line]
+    app.dependency_overrides.clear()
+
+    # Paquets de la taille de ceux du flux réel (STREAM_CHUNK_SIZE lignes)
+    chunk = settings.stream_chunk_size
+    stream = [b"".join(lines[start:start + chunk]) for start in range(0, len(lines), chunk)]
+    return {f"page_{limit}": [page.content], "ndjson": stream}
+
+
+def measure(chunks: List[bytes], encoding: str, level: int, repeat: int) -> Dict[str, Any]:
+    """
+    Compresse un corps et mesure la taille produite et le temps CPU (meilleur de `repeat` essais).
+
+    Args:
+        chunks (List[bytes]): Paquets du corps ; chacun est vidé comme dans un flux s'il y en a plusieurs.
+        encoding (str): Encodage (`gzip`, `br`, `zstd`).
+        level (int): Niveau de compression.
+        repeat (int): Nombre d'essais.
+
+    Returns:
+        Dict[str, Any]: Taille compressée, ratio, temps CPU et débit en entrée.
+    """
+    raw_size = sum(len(chunk) for chunk in chunks)
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        start = time.process_time()
+        compressor = COMPRESSORS[encoding](level)
+        size = sum(len(compressor.compress(chunk, flush=len(chunks) > 1)) for chunk in chunks)
+        size += len(compressor.finish())
+        best = min(best, time.process_time() - start)
+    return {
+        "encoding": encoding,
+        "level": level,
+        "bytes": size,
+        "ratio": round(raw_size / size, 2) if size else 0.0,
+        "cpu_ms": round(best * 1000, 3),
+        "mb_per_s": round(raw_size / best / 1e6, 1) if best > 0 else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Taille et coût CPU de la compression des réponses.")
+    parser.add_argument("--products", type=int, default=5000, help="Nombre de produits générés")
+    parser.add_argument("--limit", type=int, default=settings.page_size_max, help="Taille de la page mesurée")
+    parser.add_argument("--repeat", type=int, default=5, help="Essais par niveau (le meilleur est retenu)")
+    parser.add_argument("--encoding", action="append", choices=list(COMPRESSORS),
+                        help="Encodage mesuré (répétable, tous ceux installés par défaut)")
+    parser.add_argument("--output", default=os.path.join(environment.ROOT, "benchmarks", "results"),
+                        help="Dossier des résultats JSON")
+    args = parser.parse_args()
+
+    environment.seed(args.products)
+    payloads = asyncio.run(fetch_payloads(args.limit))
+    defaults = {"gzip": settings.compression_gzip_level, "br": settings.compression_brotli_level,
+                "zstd": settings.compression_zstd_level}
+    encodings = [encoding for encoding in args.encoding or available_encodings() if encoding in available_encodings()]
+
+    results: Dict[str, Any] = {}
+    for name, chunks in payloads.items():
+        raw_size = sum(len(chunk) for chunk in chunks)
+        print(f"\n{name} : {raw_size / 1024:.0f} Kio non compressés, {len(chunks)} paquet(s)")
+        print(f"{'encodage':>9} {'niveau':>7} {'Kio':>9} {'ratio':>7} {'CPU ms':>9} {'Mo/s':>8}")
+        rows = []
+        for encoding in encodings:
+            for level in LEVELS[encoding]:
+                row = measure(chunks, encoding, level, args.repeat)
+                rows.append(row)
+                marker = "*" if level == defaults[encoding] else " "
+                print(f"{encoding:>9} {level:>6}{marker} {row['bytes'] / 1024:9.1f} {row['ratio']:7.2f} "
+                      f"{row['cpu_ms']:9.2f} {row['mb_per_s'] or 0:8.1f}")
+        results[name] = {"bytes": raw_size, "chunks": len(chunks), "levels": rows}
+
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"compression-{environment.git_commit()}.json")
+    with open(path, "w") as file:
+        json.dump({"commit": environment.git_commit(), "products": args.products, "payloads": results}, file, indent=2)
+    print(f"\nRésultats enregistrés dans {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Fixtures communes des benchmarks pytest-benchmark : base SQLite remplie une fois
+par session et client de test branché sur l'application.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import environment  # noqa: E402
+
+environment.configure()
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+PRODUCTS = int(os.environ.get("BENCH_PRODUCTS", "5000"))
+
+
+@pytest.fixture(scope="session")
+def products() -> int:
+    """Remplit la base de test et renvoie le nombre de produits créés."""
+    environment.seed(PRODUCTS)
+    return PRODUCTS
+
+
+@pytest.fixture(scope="session")
+def client(products: int):
+    """Client HTTP en processus, avec un utilisateur administrateur pour les écritures."""
+    from app.auth.auth import get_current_user
+    from app.main import app
+
+    app.dependency_overrides[get_current_user] = environment.admin_override
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
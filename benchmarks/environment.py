@@ -0,0 +1,84 @@
+"""
+Environnement commun des benchmarks : base SQLite locale remplie par app.seed,
+identifiants de test et client HTTP en processus (httpx + ASGI).
+
+`configure()` doit être appelé avant le premier import de `app` : la configuration
+est lue et validée au chargement de app.config.
+"""
+import os
+import subprocess
+import sys
+from typing import Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+USERNAME = "testuser"
+PASSWORD = "benchmark-password"
+DEFAULT_DB_PATH = os.path.join(ROOT, "benchmarks", ".bench.db")
+
+
+def configure(db_path: str = DEFAULT_DB_PATH) -> None:
+    """
+    Renseigne les variables d'environnement de l'API pour une base SQLite locale.
+
+    Les valeurs déjà définies (ex. DB_URL pointant vers un autre serveur) sont conservées.
+
+    Args:
+        db_path (str): Chemin du fichier SQLite utilisé par les benchmarks.
+    """
+    from passlib.context import CryptContext
+
+    os.environ.setdefault("DB_URL", f"sqlite:///{db_path}")
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    if "HASHED_PASSWORD" not in os.environ:
+        # Coût minimal : le benchmark de /token mesure l'API, pas le facteur de travail bcrypt
+        os.environ["HASHED_PASSWORD"] = CryptContext(schemes=["bcrypt"]).hash(PASSWORD, rounds=4)
+    # Le cache des produits masquerait le coût des lectures en base
+    os.environ.setdefault("PRODUCT_CACHE_ENABLED", "false")
+    # Nombre de requêtes SQL de chaque requête HTTP, vérifié par bench_queries.py
+    os.environ.setdefault("SERVER_TIMING_ENABLED", "true")
+
+
+def seed(products: int = 1000) -> Dict[str, int]:
+    """
+    (Re)crée le jeu de données de test.
+
+    Args:
+        products (int): Nombre de produits à créer.
+
+    Returns:
+        Dict[str, int]: Nombre de lignes créées par table.
+    """
+    from app.seed import seed_database
+
+    return seed_database(products=products)
+
+
+def admin_override() -> Dict[str, object]:
+    """
+    Utilisateur injecté à la place de get_current_user pour les routes d'écriture.
+
+    Returns:
+        Dict[str, object]: Utilisateur administrateur fictif.
+    """
+    return {"username": USERNAME, "role": "admin", "scopes": ["products:read", "products:write"], "is_admin": True}
+
+
+def git_commit() -> str:
+    """
+    Identifie le commit mesuré, pour comparer les résultats d'un commit à l'autre.
+
+    Returns:
+        str: Hash court du commit courant, suffixé de `-dirty` si l'arbre est modifié.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
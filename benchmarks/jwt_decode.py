@@ -0,0 +1,55 @@
+"""
+Micro-benchmark du décodage des tokens JWT : python-jose, HS256 en bibliothèque standard,
+et recherche dans le cache des tokens validés.
+
+Usage :
+    python benchmarks/jwt_decode.py [nombre_d_iterations]
+"""
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Valeurs factices : le benchmark n'a besoin ni de la base ni du fichier .env
+for name, value in {
+    "SECRET_KEY": "benchmark-secret",
+    "SERVER_NAME": "localhost",
+    "BDD_NAME": "benchmark",
+    "USER": "benchmark",
+    "MDP": "benchmark",
+    "HASHED_PASSWORD": "benchmark",
+}.items():
+    os.environ.setdefault(name, value)
+
+from app.auth.tokens import HS256Codec, JoseCodec, TokenCache  # noqa: E402
+
+
+def main(iterations: int = 20000) -> None:
+    secret = os.environ["SECRET_KEY"]
+    claims = {"sub": "testuser", "exp": datetime.utcnow() + timedelta(minutes=30)}
+    jose_codec = JoseCodec(secret, "HS256")
+    hs256_codec = HS256Codec(secret)
+    token = jose_codec.encode(claims)
+
+    # Les deux implémentations doivent accepter les tokens l'une de l'autre
+    assert hs256_codec.decode(token) == jose_codec.decode(token)
+    assert jose_codec.decode(hs256_codec.encode(claims)) == hs256_codec.decode(token)
+
+    cache = TokenCache(max_size=1024)
+    cache.add(token, hs256_codec.decode(token))
+
+    candidates = {
+        "python-jose": lambda: jose_codec.decode(token),
+        "hs256 (stdlib)": lambda: hs256_codec.decode(token),
+        "cache": lambda: cache.get(token),
+    }
+    print(f"{'implémentation':<16}{'µs/décodage':>14}")
+    for label, fn in candidates.items():
+        seconds = min(timeit.repeat(fn, number=iterations, repeat=3))
+        print(f"{label:<16}{seconds / iterations * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
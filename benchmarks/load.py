@@ -0,0 +1,237 @@
+"""
+Test de charge en processus : l'API est appelée via httpx et son transport ASGI, sans serveur
+ni réseau, sur une base SQLite remplie par app.seed.
+
+Chaque scénario (/token, liste, lecture, création, mise à jour, suppression) envoie un nombre
+fixe de requêtes avec une concurrence donnée, puis affiche p50/p99 et le débit. Les résultats
+sont enregistrés en JSON (un fichier par commit) pour comparer deux versions du code.
+
+Usage :
+    python benchmarks/load.py [--products 5000] [--requests 500] [--concurrency 16]
+                              [--scenario list --scenario get] [--output benchmarks/results]
+                              [--compare benchmarks/results/abc1234.json]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import environment  # noqa: E402
+
+environment.configure()
+
+import httpx  # noqa: E402
+
+from app.auth.auth import get_current_user  # noqa: E402
+from app.main import app  # noqa: E402
+
+Request = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Percentile par rang le plus proche.
+
+    Args:
+        values (List[float]): Valeurs triées.
+        percent (float): Percentile voulu, entre 0 et 100.
+
+    Returns:
+        float: Valeur du percentile.
+    """
+    index = max(0, min(len(values) - 1, round(percent / 100 * len(values)) - 1))
+    return values[index]
+
+
+def build_scenarios(products: int) -> Tuple[Dict[str, Request], List[int]]:
+    """
+    Construit les requêtes de chaque scénario. Les produits créés par `create` sont
+    ensuite supprimés par `delete`, ce qui laisse le jeu de données initial intact.
+
+    Args:
+        products (int): Nombre de produits présents dans la base.
+
+    Returns:
+        Tuple[Dict[str, Request], List[int]]: Fonction d'envoi d'une requête par nom de scénario,
+            et liste des ProductID créés restant à supprimer.
+    """
+    rng = random.Random(42)
+    created: List[int] = []
+    numbers = itertools.count(1)
+
+    async def token(client: httpx.AsyncClient, _: int) -> httpx.Response:
+        return await client.post("/token", data={"username": environment.USERNAME, "password": environment.PASSWORD})
+
+    async def list_page(client: httpx.AsyncClient, _: int) -> httpx.Response:
+        return await client.get("/products/", params={"after": rng.randint(0, products), "limit": 100})
+
+    async def get(client: httpx.AsyncClient, _: int) -> httpx.Response:
+        return await client.get(f"/products/{rng.randint(1, products)}")
+
+    async def batch_get(client: httpx.AsyncClient, _: int) -> httpx.Response:
+        # Taille typique d'un panier ou d'une liste de recommandations
+        return await client.post("/products/batch-get", json={"ids": rng.sample(range(1, products + 1), min(100, products))})
+
+    async def create(client: httpx.AsyncClient, _: int) -> httpx.Response:
+        number = next(numbers)
+        response = await client.post("/products/", json={
+            "Name": f"Load {number}", "ProductNumber": f"LT-{os.getpid()}-{number}", "ListPrice": 10.0,
+        })
+        if response.status_code == 200:
+            created.append(response.json()["ProductID"])
+        return response
+
+    async def update(client: httpx.AsyncClient, _: int) -> httpx.Response:
+        product_id = rng.randint(1, products)
+        return await client.put(f"/products/{product_id}", json={
+            "Name": f"Updated {product_id}", "ProductNumber": f"BN-{product_id:07d}", "ListPrice": 20.0,
+        })
+
+    async def delete(client: httpx.AsyncClient, _: int) -> httpx.Response:
+        return await client.delete(f"/products/{created.pop()}")
+
+    scenarios = {
+        "token": token, "list": list_page, "get": get, "batch_get": batch_get,
+        "create": create, "update": update, "delete": delete,
+    }
+    return scenarios, created
+
+
+async def run_scenario(client: httpx.AsyncClient, send: Request, requests: int, concurrency: int) -> Dict[str, Any]:
+    """
+    Envoie `requests` requêtes avec au plus `concurrency` requêtes simultanées.
+
+    Args:
+        client (httpx.AsyncClient): Client branché sur l'application.
+        send (Request): Fonction d'envoi d'une requête.
+        requests (int): Nombre total de requêtes.
+        concurrency (int): Nombre de requêtes simultanées.
+
+    Returns:
+        Dict[str, Any]: Latences (ms), débit et nombre d'erreurs.
+    """
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for index in counter:
+            start = time.perf_counter()
+            response = await send(client, index)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "rps": round(requests / elapsed, 1),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Remplit la base puis exécute les scénarios demandés, dans l'ordre.
+
+    Args:
+        args (argparse.Namespace): Options de la ligne de commande.
+
+    Returns:
+        Dict[str, Any]: Résultats complets, prêts à être enregistrés en JSON.
+    """
+    environment.seed(args.products)
+    scenarios, created = build_scenarios(args.products)
+    # Les routes d'écriture sont réservées aux administrateurs
+    app.dependency_overrides[get_current_user] = environment.admin_override
+
+    results: Dict[str, Any] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for name in args.scenario or list(scenarios):
+                requests = args.requests
+                if name == "delete":
+                    # Ne supprime que les produits créés par le scénario `create`
+                    requests = min(requests, len(created))
+                    if not requests:
+                        continue
+                results[name] = await run_scenario(client, scenarios[name], requests, args.concurrency)
+                print(f"{name:>8}  p50 {results[name]['p50_ms']:8.2f} ms  p99 {results[name]['p99_ms']:8.2f} ms  "
+                      f"{results[name]['rps']:8.1f} req/s  erreurs {results[name]['errors']}")
+    app.dependency_overrides.clear()
+
+    return {
+        "commit": environment.git_commit(),
+        "date": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "database": os.environ["DB_URL"].split(":", 1)[0],
+        "products": args.products,
+        "concurrency": args.concurrency,
+        "scenarios": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline_path: str) -> None:
+    """
+    Affiche l'écart de p99 et de débit par rapport à un résultat précédent.
+
+    Args:
+        current (Dict[str, Any]): Résultats de l'exécution courante.
+        baseline_path (str): Fichier JSON de référence.
+    """
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    print(f"\nComparaison avec {baseline['commit']} :")
+    for name, result in current["scenarios"].items():
+        reference: Optional[Dict[str, Any]] = baseline["scenarios"].get(name)
+        if not reference:
+            continue
+        p99 = (result["p99_ms"] / reference["p99_ms"] - 1) * 100
+        rps = (result["rps"] / reference["rps"] - 1) * 100
+        print(f"{name:>8}  p99 {p99:+7.1f} %  débit {rps:+7.1f} %")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Test de charge en processus de l'API.")
+    parser.add_argument("--products", type=int, default=5000, help="Nombre de produits générés")
+    parser.add_argument("--requests", type=int, default=500, help="Requêtes par scénario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requêtes simultanées")
+    parser.add_argument("--scenario", action="append",
+                        choices=["token", "list", "get", "batch_get", "create", "update", "delete"],
+                        help="Scénario à exécuter (répétable, tous par défaut)")
+    parser.add_argument("--output", default=os.path.join(environment.ROOT, "benchmarks", "results"),
+                        help="Dossier des résultats JSON")
+    parser.add_argument("--compare", help="Résultat JSON de référence")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"{results['commit']}.json")
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"\nRésultats enregistrés dans {path}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
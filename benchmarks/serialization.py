@@ -0,0 +1,88 @@
+"""
+Micro-benchmark de la sérialisation d'une page de produits, par ligne :
+
+- avant : objets ORM Product revalidés par le modèle de réponse, puis jsonable_encoder et json ;
+- après : dictionnaires issus des lignes SQL encodés directement avec orjson (FAST_JSON).
+
+Usage :
+    python benchmarks/serialization.py [nombre_de_lignes]
+"""
+import json
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Valeurs factices : le benchmark n'a besoin ni de la base ni du fichier .env
+for name, value in {
+    "SECRET_KEY": "benchmark-secret",
+    "SERVER_NAME": "localhost",
+    "BDD_NAME": "benchmark",
+    "USER": "benchmark",
+    "MDP": "benchmark",
+    "HASHED_PASSWORD": "benchmark",
+}.items():
+    os.environ.setdefault(name, value)
+
+import orjson  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from app.models import Product, ProductPage  # noqa: E402
+
+
+def make_rows(count: int) -> list:
+    """Génère des lignes telles que renvoyées par un SELECT sur toutes les colonnes."""
+    now = datetime(2024, 1, 1, 12, 0)
+    return [
+        {
+            "ProductID": index,
+            "Name": f"Produit {index}",
+            "ProductNumber": f"P-{index:06d}",
+            "Color": "Black",
+            "StandardCost": 12.5,
+            "ListPrice": 25.0,
+            "Size": "M",
+            "Weight": 1.2,
+            "ProductCategoryID": index % 40,
+            "ProductModelID": index % 120,
+            "SellStartDate": now,
+            "SellEndDate": None,
+            "DiscontinuedDate": None,
+            "ThumbnailPhotoFileName": "no_image_available_small.gif",
+            "rowguid": uuid.uuid4(),
+            "ModifiedDate": now,
+        }
+        for index in range(1, count + 1)
+    ]
+
+
+def main(count: int = 1000) -> None:
+    rows = make_rows(count)
+    page_adapter = TypeAdapter(ProductPage)
+
+    def before() -> bytes:
+        # Hydratation ORM, validation par le modèle de réponse, puis encodage standard
+        products = [Product.model_validate(row) for row in rows]
+        page = page_adapter.validate_python(
+            {"items": [product.model_dump() for product in products], "next_cursor": count}
+        )
+        return json.dumps(jsonable_encoder(page_adapter.dump_python(page, exclude_unset=True))).encode()
+
+    def after() -> bytes:
+        return orjson.dumps({"items": rows, "next_cursor": count}, option=orjson.OPT_NON_STR_KEYS)
+
+    # Les deux chemins produisent les mêmes données
+    assert json.loads(before())["items"][0]["ProductNumber"] == json.loads(after())["items"][0]["ProductNumber"]
+
+    print(f"{count} lignes par page")
+    print(f"{'chemin':<34}{'µs/ligne':>10}")
+    for label, fn in (("avant (ORM + modèle + json)", before), ("après (lignes SQL + orjson)", after)):
+        seconds = min(timeit.repeat(fn, number=5, repeat=3)) / 5
+        print(f"{label:<34}{seconds / count * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)